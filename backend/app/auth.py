@@ -2,10 +2,10 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models import User
 from app.schemas import User as UserSchema
 import os
@@ -19,6 +19,9 @@ load_dotenv("config.env")
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Event stream tokens travel in URLs (and so in access logs): one job, short life
+STREAM_TOKEN_EXPIRE_SECONDS = int(os.getenv("STREAM_TOKEN_EXPIRE_SECONDS", "120"))
+STREAM_TOKEN_PURPOSE = "job_events"
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 security = HTTPBearer()
@@ -39,6 +42,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_stream_token(user_id: int, job_id: int) -> str:
+    """Token that only opens ``job_id``'s event stream, for the ?token= query parameter"""
+    return create_access_token(
+        data={"sub": str(user_id), "job": job_id, "purpose": STREAM_TOKEN_PURPOSE},
+        expires_delta=timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS),
+    )
+
 def verify_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -58,7 +68,8 @@ def get_current_user(
     
     token = credentials.credentials
     payload = verify_token(token)
-    if payload is None:
+    # Single-purpose tokens (event streams) are not session tokens
+    if payload is None or payload.get("purpose"):
         raise credentials_exception
     
     user_id: int = payload.get("sub")
@@ -71,6 +82,53 @@ def get_current_user(
     
     return user
 
+def get_optional_user(request: Request, db: Session = Depends(get_db)) -> Optional[User]:
+    """The active user of a Bearer session token, or None for anonymous requests"""
+    header = request.headers.get("Authorization", "")
+    if not header.lower().startswith("bearer "):
+        return None
+    payload = verify_token(header[7:])
+    if payload is None or payload.get("purpose") or payload.get("sub") is None:
+        return None
+    user = db.query(User).filter(User.id == payload.get("sub")).first()
+    return user if user is not None and user.is_active else None
+
+def get_event_stream_user(request: Request, job_id: int, token: Optional[str] = None) -> User:
+    """Like get_current_active_user, also accepting ``?token=`` since EventSource can't send headers.
+
+    The query token must be a stream token for this ``job_id`` (see
+    create_stream_token), never a session token. Uses its own short-lived
+    session: a get_db session would stay open for the whole life of the stream.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    header = request.headers.get("Authorization", "")
+    if header.lower().startswith("bearer "):
+        payload = verify_token(header[7:])
+        if payload is not None and payload.get("purpose"):
+            payload = None
+    else:
+        payload = verify_token(token) if token else None
+        if payload is not None and (payload.get("purpose") != STREAM_TOKEN_PURPOSE or payload.get("job") != job_id):
+            payload = None
+    if payload is None or payload.get("sub") is None:
+        raise credentials_exception
+    
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == payload.get("sub")).first()
+    finally:
+        db.close()
+    if user is None:
+        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -1,5 +1,7 @@
 from celery import Celery
+from kombu import Queue
 import os
+import sys
 from dotenv import load_dotenv
 
 # Try to load environment variables, but don't fail if there are encoding issues
@@ -18,10 +20,42 @@ celery_app = Celery(
     include=["app.tasks"]
 )
 
+# Processing queues by customer tier; each runs in its own worker pool
+PROCESSING_QUEUES = ("paid", "free", "public")
+
+# Worker processes per queue (python -m app.celery_app <queue>)
+QUEUE_CONCURRENCY = {
+    "paid": int(os.getenv("CELERY_PAID_CONCURRENCY", "2")),
+    "free": int(os.getenv("CELERY_FREE_CONCURRENCY", "1")),
+    "public": int(os.getenv("CELERY_PUBLIC_CONCURRENCY", "1")),
+}
+
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    task_queues=[Queue(name) for name in PROCESSING_QUEUES],
+    task_default_queue="free",
+    # Ack only after the job finishes so a killed worker's job is redelivered,
+    # and reserve one job at a time so long videos don't hold others hostage
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
 )
+
+if __name__ == "__main__":
+    # Start a worker for one queue with its configured concurrency
+    queue = sys.argv[1] if len(sys.argv) > 1 else "free"
+    if queue not in PROCESSING_QUEUES:
+        sys.exit(f"Unknown queue {queue!r}; expected one of {', '.join(PROCESSING_QUEUES)}")
+    # Import by module name so tasks register on the same app instance
+    from app.celery_app import celery_app as worker_app
+    worker_app.worker_main([
+        "worker",
+        "--loglevel=info",
+        "-Q", queue,
+        "-c", str(QUEUE_CONCURRENCY[queue]),
+        "-n", f"{queue}@%h",
+    ])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, Boolean, Text, ForeignKey, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -59,11 +59,108 @@ class Job(Base):
     processing_started_at = Column(DateTime, nullable=True)
     processing_completed_at = Column(DateTime, nullable=True)
     watermark_selections = Column(Text, nullable=True)  # JSON string of watermark selections
+    
+    # Processing lease, renewed by heartbeat while a worker runs the job
+    attempts = Column(Integer, default=0)  # Processing runs started
+    heartbeat_at = Column(DateTime, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)  # Orphaned once this passes
+    partial_output_path = Column(String, nullable=True)  # Output being written, removed if the run dies
+    preempted_seconds = Column(Float, default=0.0)  # Run time of earlier runs that yielded to deadline jobs
+    batch_id = Column(Integer, ForeignKey("job_batches.id"), nullable=True, index=True)  # Submitted together with other jobs
+    
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="jobs")
+    batch = relationship("JobBatch", back_populates="jobs")
+    media = relationship("MediaMetadata", back_populates="job", uselist=False, cascade="all, delete-orphan")
+    queue_entry = relationship("JobQueueEntry", back_populates="job", uselist=False, cascade="all, delete-orphan")
+    segments = relationship("JobSegment", back_populates="job", cascade="all, delete-orphan", order_by="JobSegment.segment_index")
+    
+    __table_args__ = (
+        # Keyset pagination of a user's jobs, newest first
+        Index("ix_jobs_user_created_id", "user_id", "created_at", "id"),
+    )
+
+class JobBatch(Base):
+    """Jobs submitted together with one watermark selection set"""
+    __tablename__ = "job_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    watermark_selections = Column(Text, nullable=True)  # JSON applied to every job in the batch
+    created_at = Column(DateTime, server_default=func.now())
+    
+    # Relationships
+    jobs = relationship("Job", back_populates="batch", order_by="Job.id")
+
+class WatermarkPreset(Base):
+    """A saved watermark selection set, in fractions of the frame size"""
+    __tablename__ = "watermark_presets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    watermarks = Column(Text, nullable=False)  # JSON list of {x, y, width, height}, each 0..1
+    auto_apply = Column(Boolean, default=False)  # Applied to the owner's uploads when no preset is named
+    shared = Column(Boolean, default=False)  # Usable by id from the public widget
+    created_at = Column(DateTime, server_default=func.now())
+    
+    # Relationships
+    user = relationship("User")
+
+class MediaMetadata(Base):
+    """ffprobe facts about a job's uploaded video, recorded once at upload"""
+    __tablename__ = "media_metadata"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), unique=True, nullable=False, index=True)
+    duration = Column(Float, nullable=True)  # Seconds
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    fps = Column(Float, nullable=True)
+    codec = Column(String, nullable=True)
+    bit_rate = Column(BigInteger, nullable=True)  # Bits per second
+    keyframe_interval = Column(Float, nullable=True)  # Mean seconds between keyframes
+    size_bytes = Column(BigInteger, nullable=True)
+    probed_at = Column(DateTime, server_default=func.now())
+    
+    # Relationships
+    job = relationship("Job", back_populates="media")
+
+class JobQueueEntry(Base):
+    """A job waiting in, or leased from, the database-backed processing queue"""
+    __tablename__ = "job_queue"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), unique=True, nullable=False, index=True)
+    queue = Column(String, nullable=False, default="free", index=True)  # paid, free, public
+    priority = Column(Float, nullable=False, default=0.0)  # Lowest is claimed first
+    enqueued_at = Column(DateTime, server_default=func.now())
+    lease_owner = Column(String, nullable=True)  # Worker id holding the job
+    lease_expires_at = Column(DateTime, nullable=True, index=True)  # Claimable again after this
+    heartbeat_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)  # Times the job has been claimed
+    
+    # Relationships
+    job = relationship("Job", back_populates="queue_entry")
+
+class JobSegment(Base):
+    """A finished, checkpointed segment of a job's encode"""
+    __tablename__ = "job_segments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
+    segment_index = Column(Integer, nullable=False)
+    start_seconds = Column(Float, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    path = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)  # Filter/encoder settings the segment was made with
+    completed_at = Column(DateTime, server_default=func.now())
+    
+    # Relationships
+    job = relationship("Job", back_populates="segments")
 
 class CreditPurchase(Base):
     __tablename__ = "credit_purchases"
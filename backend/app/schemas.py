@@ -33,6 +33,21 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+# Media metadata schemas
+class MediaMetadata(BaseModel):
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    codec: Optional[str] = None
+    bit_rate: Optional[int] = None
+    keyframe_interval: Optional[float] = None
+    size_bytes: Optional[int] = None
+    probed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
 # Job schemas
 class JobBase(BaseModel):
     original_filename: str
@@ -51,6 +66,7 @@ class Job(JobBase):
     processing_completed_at: Optional[datetime]
     created_at: datetime
     updated_at: datetime
+    media: Optional[MediaMetadata] = None
     
     class Config:
         from_attributes = True
@@ -60,6 +76,70 @@ class JobStatusResponse(BaseModel):
     status: JobStatus
     progress: Optional[float] = None
     error_message: Optional[str] = None
+    queue_position: Optional[int] = None  # 1-based while waiting for a worker, 0 once started
+    eta_seconds: Optional[float] = None  # Expected seconds until done, while queued or running
+    media: Optional[MediaMetadata] = None
+
+class BulkJobStatus(BaseModel):
+    job_id: int
+    status: JobStatus
+    error_message: Optional[str] = None
+    has_processed: bool = False
+    queue_position: Optional[int] = None
+
+class BulkJobStatusResponse(BaseModel):
+    jobs: List[BulkJobStatus]
+    missing: List[int] = []  # Requested ids that don't exist or aren't the user's
+
+# Batch schemas
+class BatchJobStatus(BaseModel):
+    job_id: int
+    original_filename: str
+    status: JobStatus
+    error_message: Optional[str] = None
+    queue_position: Optional[int] = None
+    eta_seconds: Optional[float] = None
+
+class BatchStatusResponse(BaseModel):
+    batch_id: int
+    total: int
+    pending: int
+    processing: int
+    completed: int
+    failed: int
+    progress: float  # Fraction of jobs finished (completed or failed)
+    eta_seconds: Optional[float] = None  # Until the last job is expected to finish
+    created_at: Optional[datetime] = None
+    jobs: List[BatchJobStatus]
+
+# Watermark preset schemas
+class WatermarkRect(BaseModel):
+    x: float
+    y: float
+    width: float
+    height: float
+
+class WatermarkPresetCreate(BaseModel):
+    name: str
+    watermarks: List[WatermarkRect] = []  # Relative (0..1), or pixels with frame_width/frame_height
+    frame_width: Optional[int] = None
+    frame_height: Optional[int] = None
+    job_id: Optional[int] = None  # Save this job's selections instead of ``watermarks``
+    auto_apply: bool = False
+    shared: bool = False
+
+class WatermarkPresetUpdate(BaseModel):
+    name: Optional[str] = None
+    auto_apply: Optional[bool] = None
+    shared: Optional[bool] = None
+
+class WatermarkPreset(BaseModel):
+    id: int
+    name: str
+    watermarks: List[WatermarkRect]
+    auto_apply: bool
+    shared: bool
+    created_at: Optional[datetime] = None
 
 # Subscription schemas
 class SubscriptionCreate(BaseModel):
@@ -104,6 +184,10 @@ class VideoUploadResponse(BaseModel):
     job_id: int
     message: str
     redirect_url: Optional[str] = None
+    preset_id: Optional[int] = None  # Preset applied at upload, if any
+    status: Optional[JobStatus] = None
+    queue_position: Optional[int] = None
+    eta_seconds: Optional[float] = None
 
 class VideoDownloadResponse(BaseModel):
     download_url: str
@@ -1,9 +1,11 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, Request
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
-from fastapi.responses import RedirectResponse, FileResponse, StreamingResponse
+from fastapi.responses import RedirectResponse, FileResponse, StreamingResponse, JSONResponse, Response
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import os
 import subprocess
 import uuid
@@ -11,24 +13,39 @@ import tempfile
 import stripe
 from datetime import datetime, timedelta
 import json
+import hashlib
 
-from app.database import get_db, engine
-from app.models import Base, User, Job, JobStatus, SubscriptionTier, CreditPurchase
+from app.database import SessionLocal, get_db, engine
+from app.models import Base, User, Job, JobBatch, JobStatus, SubscriptionTier, CreditPurchase, WatermarkPreset
 from app.schemas import (
     UserCreate, UserLogin, User as UserSchema, Token,
-    JobCreate, Job as JobSchema, JobStatusResponse,
-    VideoUploadResponse, VideoDownloadResponse,
+    JobCreate, Job as JobSchema, JobStatusResponse, MediaMetadata as MediaMetadataSchema,
+    BulkJobStatusResponse,
+    BatchStatusResponse, VideoUploadResponse, VideoDownloadResponse,
+    WatermarkPresetCreate, WatermarkPresetUpdate, WatermarkPreset as WatermarkPresetSchema,
     SubscriptionCreate, SubscriptionResponse,
     CreditPurchaseCreate, CreditPurchaseResponse, CreditPack, UserCreditsResponse
 )
 from app.auth import (
     verify_password, get_password_hash, create_access_token,
-    get_current_active_user, verify_token
+    get_current_active_user, get_event_stream_user, verify_token,
+    create_stream_token, STREAM_TOKEN_EXPIRE_SECONDS, get_optional_user
 )
-from app.tasks import process_video
 from services.s3_service import s3_service
 from services.local_storage import local_storage
-from services.video_processor import process_video_with_delogo
+from services.video_processor import compile_watermark_filter, resolve_input_path
+from services.frame_sampler import frame_sampler
+from services.rate_limiter import RateLimiter
+from services.media_catalog import catalog_job_media, ensure_job_media
+from services.job_scheduler import QueueFullError
+from services.job_runner import (
+    enqueue_job, enqueue_jobs, recover_queued_jobs, queue_position, queue_eta, queue_metrics, discard_segments,
+    processing_backend, PUBLIC_USER_EMAIL
+)
+from services.job_events import TERMINAL_STATUSES, SubscriberLimitError, format_sse, job_events
+from services.job_reaper import job_reaper
+from services.job_listing import list_jobs_page, parse_fields, parse_statuses
+from services.watermark_presets import job_relative_selections, normalize_selections, preset_selections, upload_preset
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -67,8 +84,41 @@ def run_startup_migrations():
         else:
             print(f"⚠️ Migration warning: {e}")
 
+def add_job_columns():
+    """Add lease and batch columns and the listing index to an existing jobs table (any database)"""
+    try:
+        from sqlalchemy import inspect, text
+        from migrations.add_job_lease_columns import COLUMNS as JOB_LEASE_COLUMNS
+        from migrations.add_job_batch_column import COLUMNS as JOB_BATCH_COLUMNS
+        from migrations.add_job_listing_index import INDEXES as JOB_INDEXES, SQLITE_INDEXES
+        
+        job_indexes = dict(JOB_INDEXES)
+        if engine.dialect.name == "sqlite":
+            job_indexes.update(SQLITE_INDEXES)
+        
+        existing_columns = {c["name"] for c in inspect(engine).get_columns("jobs")}
+        with engine.connect() as connection:
+            for name, ddl in {**JOB_LEASE_COLUMNS, **JOB_BATCH_COLUMNS}.items():
+                if name not in existing_columns:
+                    connection.execute(text(f"ALTER TABLE jobs ADD COLUMN {name} {ddl};"))
+                    print(f"✅ Added {name} column")
+            if "batch_id" not in existing_columns:
+                connection.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_batch_id ON jobs (batch_id);"))
+            for name, target in job_indexes.items():
+                connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target};"))
+            connection.commit()
+    except Exception as e:
+        print(f"⚠️ Migration warning: {e}")
+
 # Run migrations on startup
 run_startup_migrations()
+add_job_columns()
+
+# Resume jobs that were queued when the server last stopped
+recover_queued_jobs()
+
+# Requeue jobs whose worker died mid-run (expired processing lease)
+job_reaper.start()
 
 # Initialize Stripe
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
@@ -107,6 +157,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Link", "X-Next-Cursor"],
 )
 
 security = HTTPBearer()
@@ -174,9 +225,13 @@ def public_upload_options():
 @app.post("/api/public/upload", response_model=VideoUploadResponse)
 def public_upload(
     file: UploadFile = File(...),
+    preset_id: Optional[int] = Form(None),
     db: Session = Depends(get_db)
 ):
-    """Public upload endpoint for embed widget - no authentication required"""
+    """Public upload endpoint for embed widget - no authentication required.
+
+    With the id of a shared watermark preset, processing starts right away.
+    """
     # Ensure a placeholder public user exists to satisfy NOT NULL jobs.user_id
     public_user = db.query(User).filter(User.email == "public@sora.local").first()
     if not public_user:
@@ -200,6 +255,11 @@ def public_upload(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to create public user for anonymous uploads"
                 )
+    try:
+        preset = upload_preset(db, public_user.id, preset_id, shared_only=True)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    
     # Validate file type
     if not file.content_type.startswith('video/'):
         raise HTTPException(
@@ -262,6 +322,8 @@ def public_upload(
         status=JobStatus.PENDING
     )
     db.add(job)
+    # Probe once while the upload is still on local disk
+    catalog_job_media(db, job, temp_path)
     db.commit()
     db.refresh(job)
     
@@ -269,18 +331,15 @@ def public_upload(
     print(f"✅ Public job {job.id} created successfully")
     
     # Clean up temp file
-    try:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-            print(f"✅ Temp file cleaned up: {temp_path}")
-    except Exception as e:
-        print(f"⚠️  Temp file cleanup failed: {e}")
+    _remove_temp_file(temp_path)
     
-    return VideoUploadResponse(
-        job_id=job.id,
-        message="Video uploaded successfully. Proceed to select watermarks.",
-        redirect_url=f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/process/{job.id}"
-    )
+    response = {
+        "job_id": job.id,
+        "message": "Video uploaded successfully. Proceed to select watermarks.",
+        "redirect_url": f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/process/{job.id}",
+    }
+    response.update(_start_with_preset(db, job, preset))
+    return VideoUploadResponse(**response)
 
 # Handle CORS preflight for public job status
 @app.options("/api/public/jobs/{job_id}/status")
@@ -306,6 +365,9 @@ def public_get_job_status(job_id: int, db: Session = Depends(get_db)):
         "job_id": job.id,
         "status": job.status,
         "has_processed": bool(job.processed_file_path),
+        "queue_position": queue_position(db, job.id),
+        "eta_seconds": queue_eta(job.id),
+        "media": MediaMetadataSchema.model_validate(job.media).model_dump() if job.media else None,
     }
 
 # Public: save watermark selections
@@ -320,6 +382,60 @@ def public_add_watermarks(job_id: int, watermark_data: dict, db: Session = Depen
     db.commit()
     return {"message": "Watermark selection saved", "job_id": job_id}
 
+def _start_with_preset(db: Session, job: Job, preset: Optional[WatermarkPreset]) -> dict:
+    """Apply ``preset`` to a freshly uploaded job and queue it; extra VideoUploadResponse fields"""
+    if preset is None:
+        return {}
+    selections = preset_selections(preset, job.media)
+    if selections is None:
+        # Without a probed frame size the relative preset can't be placed
+        return {"message": f"Video uploaded, but preset '{preset.name}' could not be applied. Proceed to select watermarks."}
+    job.watermark_selections = selections
+    job.status = JobStatus.PROCESSING
+    db.commit()
+    try:
+        position = enqueue_job(db, job)
+    except QueueFullError:
+        job.status = JobStatus.PENDING
+        db.commit()
+        return {
+            "message": f"Video uploaded with preset '{preset.name}'. The processing queue is full; start processing later.",
+            "preset_id": preset.id,
+            "status": job.status,
+        }
+    print(f"✅ Job {job.id} started with preset {preset.id}")
+    return {
+        "message": f"Video uploaded and processing started with preset '{preset.name}'.",
+        "preset_id": preset.id,
+        "status": job.status,
+        "queue_position": position,
+        "eta_seconds": queue_eta(job.id),
+    }
+
+def _admit_job(db: Session, job: Job):
+    """Queue a job already marked PROCESSING; 202 if it has to wait, 429 if the queue is full"""
+    try:
+        position = enqueue_job(db, job)
+    except QueueFullError as e:
+        job.status = JobStatus.PENDING
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Processing queue is full. Please retry later.",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+
+    body = {
+        "message": "Processing started" if position == 0 else "Queued for processing",
+        "job_id": job.id,
+        "queue_position": position,
+        "eta_seconds": queue_eta(job.id),
+    }
+    if position == 0:
+        return body
+    # Waiting for a worker here, or handed to an external queue (position None)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=body)
+
 # Public: start processing
 @app.post("/api/public/jobs/{job_id}/process")
 def public_start_processing(job_id: int, db: Session = Depends(get_db)):
@@ -329,48 +445,11 @@ def public_start_processing(job_id: int, db: Session = Depends(get_db)):
     if job.status != JobStatus.PENDING:
         raise HTTPException(status_code=400, detail="Job is not in pending state")
     job.status = JobStatus.PROCESSING
-    job.processing_started_at = datetime.utcnow()
     db.commit()
+    return _admit_job(db, job)
 
-    import threading
-    def process_video_async():
-        from app.database import SessionLocal
-        background_db = SessionLocal()
-        try:
-            bg_job = background_db.query(Job).filter(Job.id == job.id).first()
-            if not bg_job:
-                return
-            try:
-                out_path = process_video_with_delogo(
-                    original_file_path=bg_job.original_file_path,
-                    processed_file_path=bg_job.processed_file_path,
-                    watermark_selections_json=bg_job.watermark_selections,
-                    user_id=bg_job.user_id or 0,
-                )
-                bg_job.status = JobStatus.COMPLETED
-                bg_job.processed_file_path = out_path
-                bg_job.processing_completed_at = datetime.utcnow()
-                background_db.commit()
-                print(f"✅ Public job {bg_job.id} processing completed: {out_path}")
-            except Exception as e:
-                bg_job.status = JobStatus.FAILED
-                bg_job.error_message = str(e)
-                background_db.commit()
-                print(f"❌ Public job {bg_job.id} processing failed: {e}")
-        finally:
-            background_db.close()
-
-    thread = threading.Thread(target=process_video_async)
-    thread.start()
-    return {"message": "Processing started", "job_id": job_id}
-
-# Upload video for processing (authenticated users)
-@app.post("/api/videos/upload", response_model=VideoUploadResponse)
-def upload_video(
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
+def _check_upload_allowance(db: Session, current_user: User, count: int = 1):
+    """Raise 403 unless ``current_user`` may upload ``count`` more videos"""
     # Check credits for processing (admin users have unlimited access)
     if current_user.is_admin:
         # Admin users have unlimited access
@@ -378,21 +457,31 @@ def upload_video(
     elif current_user.subscription_tier == SubscriptionTier.FREE:
         # Free users get 1 free upload
         existing_jobs = db.query(Job).filter(Job.user_id == current_user.id).count()
-        if existing_jobs >= 1:
+        if existing_jobs + count > 1:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Free trial limit reached. Please subscribe or purchase credits to continue."
             )
     else:
         # Paid users need credits
-        if current_user.credits <= 0:
+        if current_user.credits < count:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient credits. Please purchase more credits to continue."
             )
-    
+
+def _deduct_upload_credits(current_user: User, count: int = 1):
+    # Deduct credit for paid users (skip admin users)
+    if not current_user.is_admin and current_user.subscription_tier != SubscriptionTier.FREE:
+        current_user.credits -= count
+        print(f"✅ Deducted {count} credit(s) from user {current_user.id}. Remaining credits: {current_user.credits}")
+    elif current_user.is_admin:
+        print(f"✅ Admin user {current_user.email} - no credit deduction")
+
+def _store_upload(file: UploadFile, current_user: User):
+    """Save an uploaded video to S3 (or local storage); returns (s3_key, temp_path)"""
     # Validate file type
-    if not file.content_type.startswith('video/'):
+    if not file.content_type or not file.content_type.startswith('video/'):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File must be a video"
@@ -428,6 +517,32 @@ def upload_video(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to upload file"
         )
+    return s3_key, temp_path
+
+def _remove_temp_file(temp_path: str):
+    try:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+            print(f"✅ Temp file cleaned up: {temp_path}")
+    except Exception as e:
+        print(f"⚠️  Temp file cleanup failed: {e}")
+
+# Upload video for processing (authenticated users)
+@app.post("/api/videos/upload", response_model=VideoUploadResponse)
+def upload_video(
+    file: UploadFile = File(...),
+    preset_id: Optional[int] = Form(None),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Upload a video. With ``preset_id``, or a preset marked auto_apply, its
+    selections are applied and processing starts without a separate step."""
+    try:
+        preset = upload_preset(db, current_user.id, preset_id)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    _check_upload_allowance(db, current_user)
+    s3_key, temp_path = _store_upload(file, current_user)
     
     # Create job record
     job = Job(
@@ -437,13 +552,10 @@ def upload_video(
         status=JobStatus.PENDING
     )
     db.add(job)
+    # Probe once while the upload is still on local disk
+    catalog_job_media(db, job, temp_path)
     
-    # Deduct credit for paid users (skip admin users)
-    if not current_user.is_admin and current_user.subscription_tier != SubscriptionTier.FREE:
-        current_user.credits -= 1
-        print(f"✅ Deducted 1 credit from user {current_user.id}. Remaining credits: {current_user.credits}")
-    elif current_user.is_admin:
-        print(f"✅ Admin user {current_user.email} - no credit deduction")
+    _deduct_upload_credits(current_user)
     
     db.commit()
     db.refresh(job)
@@ -452,17 +564,84 @@ def upload_video(
     print(f"✅ Job {job.id} created successfully (awaiting watermark selections)")
     
     # Clean up temp file
+    _remove_temp_file(temp_path)
+    
+    response = {"job_id": job.id, "message": "Video uploaded successfully. Proceed to select watermarks."}
+    response.update(_start_with_preset(db, job, preset))
+    return VideoUploadResponse(**response)
+
+# Get many jobs' statuses at once, with conditional GET
+MAX_BULK_STATUS_IDS = 200
+
+@app.get("/api/jobs/status", response_model=BulkJobStatusResponse)
+def get_jobs_status(
+    ids: str,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Statuses of the user's jobs ``ids`` (comma-separated) in one query.
+
+    The ETag is built from an aggregate over the ids (count, latest
+    updated_at, count per status) plus the queue positions of the ones still processing, so an
+    unchanged set answers 304 without loading the rows. ETAs aren't
+    included; use the per-job status route or the event stream for those.
+    """
     try:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-            print(f"✅ Temp file cleaned up: {temp_path}")
-    except Exception as e:
-        print(f"⚠️  Temp file cleanup failed: {e}")
+        job_ids = sorted({int(i) for i in ids.split(",") if i.strip()})
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be comma-separated integers")
+    if not job_ids or len(job_ids) > MAX_BULK_STATUS_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Give between 1 and {MAX_BULK_STATUS_IDS} job ids"
+        )
     
-    return VideoUploadResponse(
-        job_id=job.id,
-        message="Video uploaded successfully. Proceed to select watermarks."
+    owned = db.query(Job).filter(Job.user_id == current_user.id, Job.id.in_(job_ids))
+    # Per-status counts catch transitions within updated_at's resolution
+    count, latest, *by_status = (
+        owned.with_entities(
+            func.count(Job.id),
+            func.max(Job.updated_at),
+            *[func.sum(case((Job.status == s, 1), else_=0)) for s in JobStatus],
+        ).one()
+    )
+    # Positions move as other users' jobs finish, so they are part of the tag
+    positions = {}
+    if by_status[list(JobStatus).index(JobStatus.PROCESSING)]:
+        for (job_id,) in owned.filter(Job.status == JobStatus.PROCESSING).with_entities(Job.id):
+            positions[job_id] = queue_position(db, job_id)
+    
+    fingerprint = hashlib.sha1(f"{count}:{latest}:{by_status}".encode())
+    for job_id in sorted(positions):
+        fingerprint.update(f"{job_id}:{positions[job_id]};".encode())
+    fingerprint.update(",".join(map(str, job_ids)).encode())
+    etag = f'W/"{fingerprint.hexdigest()[:20]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    rows = (
+        owned.with_entities(Job.id, Job.status, Job.error_message, Job.processed_file_path)
+        .order_by(Job.id)
+        .all()
+    )
+    found = {row.id for row in rows}
+    body = BulkJobStatusResponse(
+        jobs=[
+            {
+                "job_id": row.id,
+                "status": row.status,
+                "error_message": row.error_message,
+                "has_processed": bool(row.processed_file_path),
+                "queue_position": positions.get(row.id),
+            }
+            for row in rows
+        ],
+        missing=[i for i in job_ids if i not in found],
     )
+    return JSONResponse(content=body.model_dump(mode="json"), headers=headers)
 
 # Get job status
 @app.get("/api/jobs/{job_id}/status", response_model=JobStatusResponse)
@@ -481,17 +660,208 @@ def get_job_status(
     return JobStatusResponse(
         job_id=job.id,
         status=job.status,
-        error_message=job.error_message
+        error_message=job.error_message,
+        queue_position=queue_position(db, job.id),
+        eta_seconds=queue_eta(job.id),
+        media=job.media
+    )
+
+# Job progress over Server-Sent Events, instead of polling the status routes
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_RETRY_MILLISECONDS = 3000
+
+# Fields left out of unauthenticated streams, as in public_get_job_status
+PUBLIC_EVENT_EXCLUDE = ("error_message",)
+
+def _public_event(message: dict) -> dict:
+    data = {k: v for k, v in message["data"].items() if k not in PUBLIC_EVENT_EXCLUDE}
+    return dict(message, data=data)
+
+def _job_status_snapshot(job_id: int, user_id: Optional[int] = None, public: bool = False) -> Optional[dict]:
+    """A status event's data, read with a short-lived session.
+
+    With public=True only jobs owned by the public user are found.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(Job).filter(Job.id == job_id)
+        if public:
+            query = query.join(User, Job.user_id == User.id).filter(User.email == PUBLIC_USER_EMAIL)
+        elif user_id is not None:
+            query = query.filter(Job.user_id == user_id)
+        job = query.first()
+        if not job:
+            return None
+        return {
+            "job_id": job.id,
+            "status": job.status.value,
+            "error_message": job.error_message,
+            "has_processed": bool(job.processed_file_path),
+            "queue_position": queue_position(db, job.id),
+            "eta_seconds": queue_eta(job.id),
+        }
+    finally:
+        db.close()
+
+async def _job_event_stream(request: Request, job_id: int, user_id: Optional[int] = None, public: bool = False):
+    """Stream "status" and "progress" events for a job until it completes or fails.
+
+    The first frame is the current status (or, with a Last-Event-ID header,
+    the buffered events after it); ": heartbeat" comments keep idle proxies
+    from closing the connection. A final "end" event tells the client to
+    close instead of reconnecting. Public streams serve only widget jobs and
+    drop PUBLIC_EVENT_EXCLUDE fields.
+    """
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_event_id = None
+    try:
+        # Subscribe before reading the snapshot so nothing published in between is lost
+        subscription, replay = job_events.subscribe(job_id, last_event_id)
+    except SubscriberLimitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams. Poll the status endpoint instead.",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+    snapshot = await run_in_threadpool(_job_status_snapshot, job_id, user_id, public)
+    if snapshot is None:
+        job_events.unsubscribe(subscription)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    # Events from other processes (workers, or other API processes running the
+    # threads backend) only arrive through Redis; otherwise re-check on heartbeats
+    poll_db = not job_events.distributed
+    present = _public_event if public else (lambda message: message)
+
+    async def stream():
+        try:
+            yield f"retry: {SSE_RETRY_MILLISECONDS}\n\n"
+            last_status = None
+            for message in replay or [{"event": "status", "data": snapshot}]:
+                yield format_sse(present(message))
+                if message["event"] == "status":
+                    last_status = message["data"].get("status")
+            while last_status not in TERMINAL_STATUSES:
+                message = await subscription.get(SSE_HEARTBEAT_SECONDS)
+                if message is None:
+                    if await request.is_disconnected():
+                        return
+                    if poll_db:
+                        current = await run_in_threadpool(_job_status_snapshot, job_id)
+                        if current and current["status"] != last_status:
+                            message = {"event": "status", "data": current}
+                    if message is None:
+                        yield ": heartbeat\n\n"
+                        continue
+                yield format_sse(present(message))
+                if message["event"] == "status":
+                    last_status = message["data"].get("status")
+            yield "event: end\ndata: {}\n\n"
+        finally:
+            job_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
+@app.post("/api/jobs/{job_id}/events/token")
+def create_job_event_token(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Short-lived token for ?token= on the job's event stream, so the session token stays out of URLs"""
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == current_user.id).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return {"token": create_stream_token(current_user.id, job_id), "expires_in": STREAM_TOKEN_EXPIRE_SECONDS}
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_event_stream(
+    job_id: int,
+    request: Request,
+    current_user: User = Depends(get_event_stream_user)
+):
+    """Server-Sent Events for one of the user's jobs (session token in the header, or stream token in ?token=)"""
+    return await _job_event_stream(request, job_id, current_user.id)
+
+@app.get("/api/public/jobs/{job_id}/events")
+async def public_job_event_stream(job_id: int, request: Request):
+    """Server-Sent Events for a widget job (no auth, no error details)"""
+    return await _job_event_stream(request, job_id, public=True)
+
 # Get user's jobs
+JOBS_PAGE_SIZE = 50
+MAX_JOBS_PAGE_SIZE = 200
+
 @app.get("/api/jobs", response_model=List[JobSchema])
 def get_user_jobs(
+    request: Request,
+    limit: int = JOBS_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """The user's jobs, newest first, one page at a time.
+
+    Query params:
+    - limit: page size (at most 200)
+    - cursor: the X-Next-Cursor of the previous page
+    - status: comma-separated statuses to include, e.g. processing,failed
+    - fields: comma-separated job fields to return, e.g. id,status,original_filename
+
+    The next page's cursor is in the X-Next-Cursor header (and a Link
+    rel="next" header); neither is sent on the last page.
+    """
+    try:
+        statuses = parse_statuses(status_filter)
+        projection = parse_fields(fields)
+        jobs, next_cursor = list_jobs_page(
+            db,
+            current_user.id,
+            limit=max(1, min(limit, MAX_JOBS_PAGE_SIZE)),
+            cursor=cursor,
+            statuses=statuses,
+            fields=projection,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    headers = {}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return JSONResponse(content=jobs, headers=headers)
+
+# Get media metadata of a job's upload
+@app.get("/api/jobs/{job_id}/media", response_model=MediaMetadataSchema)
+def get_job_media(
+    job_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    jobs = db.query(Job).filter(Job.user_id == current_user.id).order_by(Job.created_at.desc()).all()
-    return jobs
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == current_user.id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    # Jobs uploaded before the catalog existed are probed on first request
+    media = ensure_job_media(
+        db, job, lambda j: resolve_input_path(j.original_file_path, None, j.user_id)
+    )
+    if media is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media metadata not available"
+        )
+    return media
 
 # Download processed video
 @app.get("/api/jobs/{job_id}/download", response_model=VideoDownloadResponse)
@@ -605,6 +975,9 @@ def delete_job(
             except Exception as e:
                 print(f"Warning: Could not delete file {file_path}: {e}")
         
+        # Checkpointed segments of an unfinished run
+        discard_segments(db, job)
+        
         # Delete job from database
         db.delete(job)
         db.commit()
@@ -623,6 +996,19 @@ def delete_job(
 def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+# Processing queue metrics (admins only: usage is keyed by user id)
+@app.get("/api/metrics/processing")
+def processing_metrics(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return queue_metrics(db)
+
 # Watermark selection endpoints
 @app.post("/api/jobs/{job_id}/watermarks")
 def add_watermark_selection(
@@ -692,42 +1078,266 @@ def start_processing(
     
     # Start processing
     job.status = JobStatus.PROCESSING
-    job.processing_started_at = datetime.utcnow()
     db.commit()
+    return _admit_job(db, job)
+
+# Watermark presets
+def _preset_response(preset: WatermarkPreset) -> WatermarkPresetSchema:
+    return WatermarkPresetSchema(
+        id=preset.id,
+        name=preset.name,
+        watermarks=json.loads(preset.watermarks),
+        auto_apply=bool(preset.auto_apply),
+        shared=bool(preset.shared),
+        created_at=preset.created_at,
+    )
+
+def _set_auto_apply(db: Session, preset: WatermarkPreset):
+    """Make ``preset`` its owner's only auto-apply preset"""
+    db.query(WatermarkPreset).filter(
+        WatermarkPreset.user_id == preset.user_id, WatermarkPreset.id != preset.id
+    ).update({WatermarkPreset.auto_apply: False}, synchronize_session=False)
+    preset.auto_apply = True
+
+@app.get("/api/presets", response_model=List[WatermarkPresetSchema])
+def list_presets(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    presets = (
+        db.query(WatermarkPreset)
+        .filter(WatermarkPreset.user_id == current_user.id)
+        .order_by(WatermarkPreset.name)
+        .all()
+    )
+    return [_preset_response(p) for p in presets]
+
+@app.post("/api/presets", response_model=WatermarkPresetSchema)
+def create_preset(
+    preset_data: WatermarkPresetCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Save a selection set: from a job's selections, pixel rectangles with
+    the frame size, or rectangles already relative to the frame"""
+    try:
+        if preset_data.job_id is not None:
+            job = db.query(Job).filter(Job.id == preset_data.job_id, Job.user_id == current_user.id).first()
+            if not job:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+            watermarks = job_relative_selections(job)
+        else:
+            watermarks = normalize_selections(
+                [w.model_dump() for w in preset_data.watermarks],
+                preset_data.frame_width,
+                preset_data.frame_height,
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Process using FFmpeg delogo in background thread
-    import threading
-    def process_video_async():
-        from app.database import SessionLocal
-        background_db = SessionLocal()
-        try:
-            bg_job = background_db.query(Job).filter(Job.id == job.id).first()
-            if not bg_job:
-                return
-            try:
-                out_path = process_video_with_delogo(
-                    original_file_path=bg_job.original_file_path,
-                    processed_file_path=bg_job.processed_file_path,
-                    watermark_selections_json=bg_job.watermark_selections,
-                    user_id=bg_job.user_id,
-                )
-                bg_job.status = JobStatus.COMPLETED
-                bg_job.processed_file_path = out_path
-                bg_job.processing_completed_at = datetime.utcnow()
-                background_db.commit()
-                print(f"✅ Job {bg_job.id} processing completed: {out_path}")
-            except Exception as e:
-                bg_job.status = JobStatus.FAILED
-                bg_job.error_message = str(e)
-                background_db.commit()
-                print(f"❌ Job {bg_job.id} processing failed: {e}")
-        finally:
-            background_db.close()
+    preset = WatermarkPreset(
+        user_id=current_user.id,
+        name=preset_data.name,
+        watermarks=json.dumps(watermarks),
+        shared=preset_data.shared,
+    )
+    db.add(preset)
+    db.flush()
+    if preset_data.auto_apply:
+        _set_auto_apply(db, preset)
+    db.commit()
+    db.refresh(preset)
+    return _preset_response(preset)
+
+@app.patch("/api/presets/{preset_id}", response_model=WatermarkPresetSchema)
+def update_preset(
+    preset_id: int,
+    preset_data: WatermarkPresetUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    preset = db.query(WatermarkPreset).filter(
+        WatermarkPreset.id == preset_id, WatermarkPreset.user_id == current_user.id
+    ).first()
+    if not preset:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preset not found")
+    if preset_data.name is not None:
+        preset.name = preset_data.name
+    if preset_data.shared is not None:
+        preset.shared = preset_data.shared
+    if preset_data.auto_apply:
+        _set_auto_apply(db, preset)
+    elif preset_data.auto_apply is not None:
+        preset.auto_apply = False
+    db.commit()
+    db.refresh(preset)
+    return _preset_response(preset)
+
+@app.delete("/api/presets/{preset_id}")
+def delete_preset(
+    preset_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    preset = db.query(WatermarkPreset).filter(
+        WatermarkPreset.id == preset_id, WatermarkPreset.user_id == current_user.id
+    ).first()
+    if not preset:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preset not found")
+    db.delete(preset)
+    db.commit()
+    return {"message": "Preset deleted", "preset_id": preset_id}
+
+# Batch processing: many videos, one watermark selection set
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "50"))
+
+def _batch_progress(db: Session, batch: JobBatch) -> dict:
+    jobs = []
+    counts = {state: 0 for state in JobStatus}
+    for job in batch.jobs:
+        counts[job.status] += 1
+        waiting = job.status == JobStatus.PROCESSING
+        jobs.append({
+            "job_id": job.id,
+            "original_filename": job.original_filename,
+            "status": job.status,
+            "error_message": job.error_message,
+            "queue_position": queue_position(db, job.id) if waiting else None,
+            "eta_seconds": queue_eta(job.id) if waiting else None,
+        })
+    etas = [j["eta_seconds"] for j in jobs if j["eta_seconds"] is not None]
+    total = len(jobs)
+    return BatchStatusResponse(
+        batch_id=batch.id,
+        total=total,
+        pending=counts[JobStatus.PENDING],
+        processing=counts[JobStatus.PROCESSING],
+        completed=counts[JobStatus.COMPLETED],
+        failed=counts[JobStatus.FAILED],
+        progress=round((counts[JobStatus.COMPLETED] + counts[JobStatus.FAILED]) / total, 3) if total else 1.0,
+        eta_seconds=max(etas) if etas else None,
+        created_at=batch.created_at,
+        jobs=jobs,
+    )
+
+def _admit_batch(db: Session, batch: JobBatch):
+    """Queue a batch's pending jobs together; 202 with its progress, or 429 leaving them pending"""
+    jobs = [job for job in batch.jobs if job.status == JobStatus.PENDING]
+    for job in jobs:
+        job.status = JobStatus.PROCESSING
+    db.commit()
+    try:
+        enqueue_jobs(db, jobs)
+    except QueueFullError as e:
+        for job in jobs:
+            job.status = JobStatus.PENDING
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Processing queue can't take {len(jobs)} more jobs. Batch {batch.id} is saved; retry POST /api/batches/{batch.id}/process later.",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=_batch_progress(db, batch).model_dump(mode="json"),
+    )
+
+@app.post("/api/batches")
+def create_batch(
+    watermark_selections: str = Form(...),
+    files: List[UploadFile] = File(default=[]),
+    job_ids: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Upload ``files`` and/or take pending jobs ``job_ids`` (comma-separated),
+    apply one watermark selection set to all of them and queue them together"""
+    # Compiled once here; workers hit the same cache entry for every job in the batch
+    _, filter_chain = compile_watermark_filter(watermark_selections)
+    if not filter_chain:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="watermark_selections has no valid watermark rectangles"
+        )
     
-    thread = threading.Thread(target=process_video_async)
-    thread.start()
+    try:
+        ids = [int(i) for i in (job_ids or "").split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="job_ids must be comma-separated integers")
+    existing = []
+    if ids:
+        existing = db.query(Job).filter(Job.id.in_(ids), Job.user_id == current_user.id).all()
+        if len(existing) != len(set(ids)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        if any(job.status != JobStatus.PENDING for job in existing):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Job is not in pending state")
     
-    return {"message": "Processing started", "job_id": job_id}
+    if not files and not existing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No files or job_ids given")
+    if len(files) + len(existing) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can hold at most {MAX_BATCH_SIZE} videos"
+        )
+    if files:
+        _check_upload_allowance(db, current_user, len(files))
+    
+    stored = []
+    try:
+        for file in files:
+            stored.append((file.filename, *_store_upload(file, current_user)))
+        
+        # Batch, jobs, media and credits in one transaction
+        batch = JobBatch(user_id=current_user.id, watermark_selections=watermark_selections)
+        db.add(batch)
+        for filename, s3_key, temp_path in stored:
+            job = Job(
+                user_id=current_user.id,
+                original_filename=filename,
+                original_file_path=s3_key,
+                status=JobStatus.PENDING,
+                watermark_selections=watermark_selections,
+                batch=batch,
+            )
+            db.add(job)
+            catalog_job_media(db, job, temp_path)
+        for job in existing:
+            job.watermark_selections = watermark_selections
+            job.batch = batch
+        if stored:
+            _deduct_upload_credits(current_user, len(stored))
+        db.commit()
+    finally:
+        for _, _, temp_path in stored:
+            _remove_temp_file(temp_path)
+    
+    db.refresh(batch)
+    print(f"✅ Batch {batch.id} created with {len(batch.jobs)} jobs")
+    return _admit_batch(db, batch)
+
+@app.get("/api/batches/{batch_id}", response_model=BatchStatusResponse)
+def get_batch_status(
+    batch_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Aggregate progress of every job in a batch"""
+    batch = db.query(JobBatch).filter(JobBatch.id == batch_id, JobBatch.user_id == current_user.id).first()
+    if not batch:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return _batch_progress(db, batch)
+
+@app.post("/api/batches/{batch_id}/process")
+def start_batch_processing(
+    batch_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a batch's still-pending jobs, e.g. after a 429 from create_batch"""
+    batch = db.query(JobBatch).filter(JobBatch.id == batch_id, JobBatch.user_id == current_user.id).first()
+    if not batch:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return _admit_batch(db, batch)
 
 # Serve video files (public endpoint for downloads)
 @app.get("/api/videos/{job_id}/stream")
@@ -912,6 +1522,66 @@ def stream_video(
     }
     return FileResponse(file_path, media_type="video/mp4", headers=headers)
 
+# Thumbnail of a sampled keyframe: widget jobs for anyone, other jobs for their owner
+THUMBNAIL_MISSES = RateLimiter(
+    max_calls=int(os.getenv("THUMBNAIL_EXTRACTIONS_PER_MINUTE", "10")),
+    per_seconds=60.0,
+)
+
+@app.get("/api/videos/{job_id}/thumbnail")
+def video_thumbnail(
+    job_id: int,
+    request: Request,
+    index: int = 0,
+    current_user: Optional[User] = Depends(get_optional_user),
+    db: Session = Depends(get_db)
+):
+    """Serve a JPEG keyframe thumbnail; extraction is shared with the detector cache.
+
+    Extracting (hashing the file and decoding keyframes) is rate limited per
+    client; thumbnails already cached are not.
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    public = job is not None and job.user is not None and job.user.email == PUBLIC_USER_EMAIL
+    owner = job is not None and current_user is not None and (current_user.id == job.user_id or current_user.is_admin)
+    if not job or not (public or owner):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    try:
+        input_path = resolve_input_path(job.original_file_path, None, job.user_id)
+        if not frame_sampler.is_cached(input_path, max_side=320):
+            client = f"user:{current_user.id}" if current_user else f"ip:{request.client.host if request.client else 'unknown'}"
+            allowed, retry_after = THUMBNAIL_MISSES.acquire(client)
+            if not allowed:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many thumbnail extractions. Try again shortly.",
+                    headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+                )
+        jpeg = frame_sampler.thumbnail_jpeg(input_path, index=index)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video file not found"
+        )
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Thumbnail extraction failed: {str(e)}"
+        )
+    
+    return Response(
+        content=jpeg,
+        media_type="image/jpeg",
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Cache-Control": f"{'public' if public else 'private'}, max-age=3600",
+        }
+    )
+
 # ===== STRIPE PAYMENT ENDPOINTS =====
 
 # Create Stripe checkout session
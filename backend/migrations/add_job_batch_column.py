@@ -0,0 +1,50 @@
+"""
+Database migration to add the batch_id column to jobs table
+Run this script to update your database schema
+"""
+
+from sqlalchemy import create_engine, inspect, text
+import os
+
+COLUMNS = {
+    "batch_id": "INTEGER REFERENCES job_batches(id)",
+}
+
+def run_migration():
+    """Create job_batches and add batch_id to jobs"""
+    
+    # Get database URL from environment
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./local_test.db')
+    
+    # Create engine
+    engine = create_engine(database_url)
+    
+    try:
+        from app.models import JobBatch
+        JobBatch.__table__.create(bind=engine, checkfirst=True)
+        
+        existing_columns = {c["name"] for c in inspect(engine).get_columns("jobs")}
+        with engine.connect() as connection:
+            added = []
+            for name, ddl in COLUMNS.items():
+                if name not in existing_columns:
+                    connection.execute(text(f"ALTER TABLE jobs ADD COLUMN {name} {ddl};"))
+                    added.append(name)
+            if "batch_id" in added:
+                connection.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_batch_id ON jobs (batch_id);"))
+            connection.commit()
+            
+            if added:
+                print("✅ Migration completed successfully!")
+                print("Added columns:")
+                for name in added:
+                    print(f"  - {name} ({COLUMNS[name]}, nullable)")
+            else:
+                print("✅ Columns already exist - migration not needed")
+            
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    run_migration()
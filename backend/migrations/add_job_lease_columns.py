@@ -0,0 +1,49 @@
+"""
+Database migration to add processing lease columns to jobs table
+Run this script to update your database schema
+"""
+
+from sqlalchemy import create_engine, inspect, text
+import os
+
+COLUMNS = {
+    "attempts": "INTEGER DEFAULT 0",
+    "heartbeat_at": "TIMESTAMP",
+    "lease_expires_at": "TIMESTAMP",
+    "partial_output_path": "VARCHAR",
+    "preempted_seconds": "FLOAT DEFAULT 0",
+}
+
+def run_migration():
+    """Add attempts, heartbeat_at, lease_expires_at, partial_output_path and preempted_seconds to jobs"""
+    
+    # Get database URL from environment
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./local_test.db')
+    
+    # Create engine
+    engine = create_engine(database_url)
+    
+    try:
+        existing_columns = {c["name"] for c in inspect(engine).get_columns("jobs")}
+        with engine.connect() as connection:
+            added = []
+            for name, ddl in COLUMNS.items():
+                if name not in existing_columns:
+                    connection.execute(text(f"ALTER TABLE jobs ADD COLUMN {name} {ddl};"))
+                    added.append(name)
+            connection.commit()
+            
+            if added:
+                print("✅ Migration completed successfully!")
+                print("Added columns:")
+                for name in added:
+                    print(f"  - {name} ({COLUMNS[name]}, nullable)")
+            else:
+                print("✅ Columns already exist - migration not needed")
+            
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    run_migration()
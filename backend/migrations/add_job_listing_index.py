@@ -0,0 +1,46 @@
+"""
+Database migration to add the keyset pagination index to jobs table
+Run this script to update your database schema
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+INDEXES = {
+    "ix_jobs_user_created_id": "jobs (user_id, created_at, id)",
+}
+
+# SQLite lists jobs ordered by datetime(created_at) (see services/job_listing.py),
+# which only an index on that same expression can serve
+SQLITE_INDEXES = {
+    "ix_jobs_user_created_dt_id": "jobs (user_id, datetime(created_at), id)",
+}
+
+def run_migration():
+    """Create the (user_id, created_at, id) index used by GET /api/jobs"""
+    
+    # Get database URL from environment
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./local_test.db')
+    
+    # Create engine
+    engine = create_engine(database_url)
+    
+    indexes = dict(INDEXES)
+    if engine.dialect.name == "sqlite":
+        indexes.update(SQLITE_INDEXES)
+    
+    try:
+        with engine.connect() as connection:
+            for name, target in indexes.items():
+                connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target};"))
+            connection.commit()
+            print("✅ Migration completed successfully!")
+            for name, target in indexes.items():
+                print(f"  - {name} on {target}")
+            
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Worker for the database-backed processing queue (PROCESSING_BACKEND=db).
+
+Run one or more of these on any node that shares the database and storage:
+
+    python queue_worker.py --queues paid,free --concurrency 2
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from app.database import engine
+from app.models import Base
+from services.db_queue import QueueWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process jobs from the database queue")
+    parser.add_argument("--queues", default=os.getenv("QUEUE_WORKER_QUEUES", "paid,free,public"),
+                        help="Comma-separated queues to consume")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("QUEUE_WORKER_CONCURRENCY", "1")),
+                        help="Jobs processed at once by this worker")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds to wait when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    Base.metadata.create_all(bind=engine)
+
+    queues = [q.strip() for q in args.queues.split(",") if q.strip()]
+    print(f"Starting queue worker for {', '.join(queues)} (concurrency {args.concurrency})")
+    QueueWorker(queues=queues, concurrency=args.concurrency, poll_interval=args.poll_interval).run()
+
+if __name__ == "__main__":
+    main()
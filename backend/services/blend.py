@@ -0,0 +1,94 @@
+"""
+Fixed-point mask blending
+out = (image * (256 - a) + inpainted * a + 128) >> 8, with integer weights
+a in 0..256 cached per mask and uint16 scratch buffers reused across frames.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from services.fast_marching import mask_key
+
+logger = logging.getLogger(__name__)
+
+
+def blend_weights(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (alpha, 256 - alpha) as uint16 (..., H, W, 1) arrays for a uint8 mask.
+
+    Maps 0 -> 0 and 255 -> 256 so fully masked pixels take the inpainted
+    value exactly.
+    """
+    alpha = mask.astype(np.uint16)
+    alpha += alpha >> 7
+    alpha = alpha[..., None]
+    return alpha, np.uint16(256) - alpha
+
+
+class FixedPointBlender:
+    """Blend an inpainted frame back over the original in uint16 fixed point.
+
+    Weights are cached per mask (LRU keyed by mask contents) and the uint16
+    accumulators are kept per frame shape, so a steady stream of frames that
+    share a mask allocates nothing per frame when ``out`` is supplied.
+    """
+
+    def __init__(self, cache_size: int = 8):
+        self.cache_size = cache_size
+        self._weights: "OrderedDict[bytes, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._scratch: Dict[Tuple[int, ...], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def weights(self, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        digest = mask_key(mask)
+        if digest in self._weights:
+            self._weights.move_to_end(digest)
+            return self._weights[digest]
+
+        cached = blend_weights(mask)
+        self._weights[digest] = cached
+        if len(self._weights) > self.cache_size:
+            self._weights.popitem(last=False)
+        return cached
+
+    def _buffers(self, shape: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        buffers = self._scratch.get(shape)
+        if buffers is None:
+            buffers = (np.empty(shape, dtype=np.uint16), np.empty(shape, dtype=np.uint16))
+            self._scratch[shape] = buffers
+        return buffers
+
+    def blend(
+        self,
+        image: np.ndarray,
+        inpainted: np.ndarray,
+        mask: np.ndarray,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Blend (H, W) or (H, W, C) uint8 frames; ``out`` may alias ``image``.
+
+        An (N, H, W, C) batch works too, with an (H, W) mask shared by every
+        frame or an (N, H, W) mask per frame.
+        """
+        squeeze = image.ndim == mask.ndim
+        if squeeze:
+            image = image[:, :, None]
+            inpainted = inpainted[:, :, None]
+            if out is not None:
+                out = out[:, :, None]
+        if out is None:
+            out = np.empty_like(image)
+
+        alpha, inverse = self.weights(mask)
+        acc, tmp = self._buffers(image.shape)
+
+        # All channels (and frames) at once: ([N,] H, W, C) * ([N,] H, W, 1)
+        np.multiply(image, inverse, out=acc, dtype=np.uint16)
+        np.multiply(inpainted, alpha, out=tmp, dtype=np.uint16)
+        acc += tmp
+        acc += 128
+        acc >>= 8
+        np.copyto(out, acc, casting="unsafe")
+
+        return out[:, :, 0] if squeeze else out
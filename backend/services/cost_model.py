@@ -0,0 +1,146 @@
+"""
+Job Cost Model
+Predicts processing seconds for a job from its probed media, the selected
+watermark area and the encoder profile it will use:
+
+    seconds = a + b * work + c * work * area_fraction
+    work    = duration * megapixels * (fps / 30) * preset_factor
+
+Coefficients start from conservative defaults and are refitted by least
+squares from the timings of recently completed jobs.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Job, JobStatus
+from services.encode_autotune import DEFAULT_PROFILE, encode_autotuner
+from services.video_processor import parse_watermark_selections
+
+logger = logging.getLogger(__name__)
+
+# x264 encode time relative to preset=medium
+PRESET_FACTORS: Dict[str, float] = {
+    "ultrafast": 0.25,
+    "superfast": 0.3,
+    "veryfast": 0.4,
+    "faster": 0.6,
+    "fast": 0.8,
+    "medium": 1.0,
+    "slow": 1.6,
+    "slower": 2.5,
+    "veryslow": 5.0,
+}
+
+# (a, b, c) used until enough history exists
+DEFAULT_COEFFICIENTS: Tuple[float, float, float] = (3.0, 0.5, 0.5)
+
+# Assumed media when a job has no catalog row: a 30 s 1080p30 clip
+DEFAULT_MEDIA = {"duration": 30.0, "width": 1920, "height": 1080, "fps": 30.0}
+
+
+def encoder_profile(media: Dict) -> Tuple[str, int]:
+    """The (preset, crf) the encoder is expected to use for this media"""
+    if os.getenv("ENCODE_AUTOTUNE", "false").lower() == "true":
+        return encode_autotuner.cached_profile(media) or DEFAULT_PROFILE
+    return DEFAULT_PROFILE
+
+
+def job_features(job: Job) -> Tuple[float, float]:
+    """(work, area_fraction) of ``job``; see the module docstring"""
+    media = DEFAULT_MEDIA
+    if job.media is not None and job.media.duration and job.media.width and job.media.height:
+        media = {
+            "duration": job.media.duration,
+            "width": job.media.width,
+            "height": job.media.height,
+            "fps": job.media.fps or 30.0,
+            "codec": job.media.codec,
+        }
+
+    megapixels = media["width"] * media["height"] / 1e6
+    preset, _ = encoder_profile(media)
+    work = media["duration"] * megapixels * (media["fps"] / 30.0) * PRESET_FACTORS.get(preset, 1.0)
+
+    frame_area = float(media["width"] * media["height"])
+    selected = 0.0
+    for wm in parse_watermark_selections(job.watermark_selections):
+        try:
+            selected += max(0.0, float(wm.get("width", 0))) * max(0.0, float(wm.get("height", 0)))
+        except (TypeError, ValueError):
+            continue
+    return work, min(1.0, selected / frame_area)
+
+
+class JobCostModel:
+    def __init__(self, min_samples: int = 8, history: int = 200, refit_interval: float = 600.0):
+        self.min_samples = min_samples
+        self.history = history
+        self.refit_interval = refit_interval
+        self.coefficients = DEFAULT_COEFFICIENTS
+        self.samples = 0
+        self._fitted_at = 0.0
+        self._lock = threading.Lock()
+
+    def predict(self, job: Job) -> float:
+        """Expected processing seconds for ``job``"""
+        work, area = job_features(job)
+        a, b, c = self.coefficients
+        return max(1.0, a + b * work + c * work * area)
+
+    def calibrate(self, db: Session) -> Tuple[float, float, float]:
+        """Refit coefficients from recently completed jobs"""
+        jobs: List[Job] = (
+            db.query(Job)
+            .options(joinedload(Job.media))
+            .filter(
+                Job.status == JobStatus.COMPLETED,
+                Job.processing_started_at.isnot(None),
+                Job.processing_completed_at.isnot(None),
+            )
+            .order_by(Job.processing_completed_at.desc())
+            .limit(self.history)
+            .all()
+        )
+
+        rows, targets = [], []
+        for job in jobs:
+            if job.media is None:
+                continue
+            # A resumed job's last run only covers what earlier, pre-empted runs left
+            seconds = (job.processing_completed_at - job.processing_started_at).total_seconds()
+            seconds += job.preempted_seconds or 0.0
+            if seconds <= 0:
+                continue
+            work, area = job_features(job)
+            rows.append((1.0, work, work * area))
+            targets.append(seconds)
+
+        with self._lock:
+            self._fitted_at = time.monotonic()
+            if len(rows) < self.min_samples:
+                return self.coefficients
+            solution, *_ = np.linalg.lstsq(np.array(rows), np.array(targets), rcond=None)
+            # Negative terms would let bigger jobs look cheaper
+            self.coefficients = tuple(float(max(0.0, v)) for v in solution)
+            self.samples = len(rows)
+        logger.info(f"Cost model calibrated on {len(rows)} jobs: {self.coefficients}")
+        return self.coefficients
+
+    def maybe_calibrate(self, db: Session) -> None:
+        """Refit when the last fit is older than ``refit_interval``"""
+        if time.monotonic() - self._fitted_at < self.refit_interval and self._fitted_at:
+            return
+        try:
+            self.calibrate(db)
+        except Exception as e:
+            logger.warning(f"Cost model calibration failed: {e}")
+
+# Global instance
+cost_model = JobCostModel()
@@ -0,0 +1,266 @@
+"""
+Database Job Queue
+A processing queue on the job_queue table, for deployments without Redis.
+Workers claim the next entry with SELECT ... FOR UPDATE SKIP LOCKED on
+PostgreSQL, or with a compare-and-set UPDATE on SQLite, and hold it under a
+lease they renew by heartbeat. An entry whose lease expires (worker killed,
+node lost) becomes claimable again.
+
+Entries are ordered by ``priority``, stored as
+
+    predicted_seconds + aging_weight * enqueue_epoch_seconds
+
+which sorts exactly like the in-process scheduler's
+predicted - aging_weight * seconds_waited, without recomputing anything.
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import JobQueueEntry, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseJobQueue:
+    def __init__(self, lease_seconds: float = 60.0, aging_weight: float = 1.0):
+        self.lease_seconds = lease_seconds
+        self.aging_weight = aging_weight
+
+    def _claimable(self, now: datetime):
+        return or_(JobQueueEntry.lease_expires_at.is_(None), JobQueueEntry.lease_expires_at < now)
+
+    def enqueue(self, db: Session, job_id: int, predicted_seconds: float, queue: str) -> JobQueueEntry:
+        """Add ``job_id`` to the queue (no-op if already queued); the caller commits"""
+        entry = db.query(JobQueueEntry).filter(JobQueueEntry.job_id == job_id).first()
+        if entry is None:
+            entry = JobQueueEntry(
+                job_id=job_id,
+                queue=queue,
+                priority=predicted_seconds + self.aging_weight * time.time(),
+            )
+            db.add(entry)
+        return entry
+
+    def position(self, db: Session, job_id: int) -> Optional[int]:
+        """1-based place among unclaimed entries, 0 if leased, None if not queued"""
+        entry = db.query(JobQueueEntry).filter(JobQueueEntry.job_id == job_id).first()
+        if entry is None:
+            return None
+        now = datetime.utcnow()
+        if not (entry.lease_expires_at is None or entry.lease_expires_at < now):
+            return 0
+        ahead = (
+            db.query(func.count(JobQueueEntry.id))
+            .filter(
+                self._claimable(now),
+                or_(
+                    JobQueueEntry.priority < entry.priority,
+                    (JobQueueEntry.priority == entry.priority) & (JobQueueEntry.id < entry.id),
+                ),
+            )
+            .scalar()
+        )
+        return ahead + 1
+
+    def depth(self, db: Session) -> Dict[str, int]:
+        now = datetime.utcnow()
+        waiting = db.query(func.count(JobQueueEntry.id)).filter(self._claimable(now)).scalar()
+        leased = db.query(func.count(JobQueueEntry.id)).filter(~self._claimable(now)).scalar()
+        return {"queue_depth": waiting, "leased": leased}
+
+    def claim(self, db: Session, worker_id: str, queues: Sequence[str]) -> Optional[Tuple[int, int, int]]:
+        """Lease the next entry for ``worker_id``; returns (entry_id, job_id, attempts)"""
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=self.lease_seconds)
+        candidates = (
+            db.query(JobQueueEntry)
+            .filter(JobQueueEntry.queue.in_(list(queues)), self._claimable(now))
+            .order_by(JobQueueEntry.priority, JobQueueEntry.id)
+        )
+
+        if db.bind.dialect.name == "postgresql":
+            # Rows locked by other claimers are skipped rather than waited on
+            entry = candidates.with_for_update(skip_locked=True).first()
+            if entry is None:
+                db.rollback()
+                return None
+            entry.lease_owner = worker_id
+            entry.lease_expires_at = expires
+            entry.heartbeat_at = now
+            entry.attempts = (entry.attempts or 0) + 1
+            db.commit()
+            return entry.id, entry.job_id, entry.attempts
+
+        # SQLite: no row locks, so claim with a conditional UPDATE and retry
+        # on the next candidate if another worker got there first
+        for entry_id, job_id, attempts in candidates.with_entities(
+            JobQueueEntry.id, JobQueueEntry.job_id, JobQueueEntry.attempts
+        ).limit(8).all():
+            claimed = (
+                db.query(JobQueueEntry)
+                .filter(JobQueueEntry.id == entry_id, self._claimable(now))
+                .update(
+                    {
+                        JobQueueEntry.lease_owner: worker_id,
+                        JobQueueEntry.lease_expires_at: expires,
+                        JobQueueEntry.heartbeat_at: now,
+                        JobQueueEntry.attempts: (attempts or 0) + 1,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if claimed == 1:
+                return entry_id, job_id, (attempts or 0) + 1
+        return None
+
+    def heartbeat(self, db: Session, entry_id: int, worker_id: str) -> bool:
+        """Extend the lease; False if ``worker_id`` no longer holds it"""
+        now = datetime.utcnow()
+        renewed = (
+            db.query(JobQueueEntry)
+            .filter(JobQueueEntry.id == entry_id, JobQueueEntry.lease_owner == worker_id)
+            .update(
+                {
+                    JobQueueEntry.lease_expires_at: now + timedelta(seconds=self.lease_seconds),
+                    JobQueueEntry.heartbeat_at: now,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return renewed == 1
+
+    def release(self, db: Session, entry_id: int, worker_id: str) -> None:
+        """Give up ``worker_id``'s claim so the entry can be claimed again right away"""
+        db.query(JobQueueEntry).filter(
+            JobQueueEntry.id == entry_id, JobQueueEntry.lease_owner == worker_id
+        ).update(
+            {JobQueueEntry.lease_owner: None, JobQueueEntry.lease_expires_at: None},
+            synchronize_session=False,
+        )
+        db.commit()
+
+    def complete(self, db: Session, entry_id: int, worker_id: str) -> None:
+        """Remove a finished entry, if ``worker_id`` still holds it"""
+        db.query(JobQueueEntry).filter(
+            JobQueueEntry.id == entry_id, JobQueueEntry.lease_owner == worker_id
+        ).delete(synchronize_session=False)
+        db.commit()
+
+
+class QueueWorker:
+    """Claims jobs from the database queue on ``concurrency`` threads.
+
+    Each claimed job gets a heartbeat thread that renews its lease every
+    third of the lease period until the job returns.
+    """
+
+    def __init__(
+        self,
+        queues: Sequence[str] = ("paid", "free", "public"),
+        concurrency: int = 1,
+        poll_interval: float = 2.0,
+        job_queue: Optional[DatabaseJobQueue] = None,
+    ):
+        self.queues = list(queues)
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.job_queue = job_queue or db_job_queue
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+
+    def stop(self, *_args) -> None:
+        logger.info(f"Worker {self.name} stopping after current jobs")
+        self._stop.set()
+
+    def _heartbeat(self, entry_id: int, worker_id: str, done: threading.Event) -> None:
+        while not done.wait(self.job_queue.lease_seconds / 3.0):
+            db = SessionLocal()
+            try:
+                if not self.job_queue.heartbeat(db, entry_id, worker_id):
+                    logger.warning(f"{worker_id} lost the lease on queue entry {entry_id}")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for queue entry {entry_id}: {e}")
+            finally:
+                db.close()
+
+    def run_once(self, worker_id: str) -> bool:
+        """Claim and run one job; False if the queue was empty"""
+        from services.job_reaper import lease_held
+        from services.job_runner import run_job
+
+        db = SessionLocal()
+        try:
+            claimed = self.job_queue.claim(db, worker_id, self.queues)
+        finally:
+            db.close()
+        if claimed is None:
+            return False
+
+        entry_id, job_id, attempts = claimed
+        logger.info(f"{worker_id} claimed job {job_id} (attempt {attempts})")
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(entry_id, worker_id, done), daemon=True)
+        beat.start()
+        status = None
+        try:
+            status = run_job(job_id)
+        finally:
+            done.set()
+            beat.join()
+            db = SessionLocal()
+            try:
+                if status == JobStatus.PROCESSING:
+                    # The run failed but kept its segments for another attempt
+                    self.job_queue.release(db, entry_id, worker_id)
+                # Skipped because another worker still holds the job's lease: keep
+                # the entry so it is redelivered once our claim lapses, in case
+                # that worker dies before finishing
+                elif status is not None or not lease_held(db, job_id):
+                    self.job_queue.complete(db, entry_id, worker_id)
+            finally:
+                db.close()
+        return True
+
+    def _loop(self, slot: int) -> None:
+        worker_id = f"{self.name}:{slot}"
+        while not self._stop.is_set():
+            try:
+                if self.run_once(worker_id):
+                    continue
+            except Exception as e:
+                logger.exception(f"{worker_id} error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def run(self) -> None:
+        """Process jobs until SIGINT/SIGTERM"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        threads: List[threading.Thread] = []
+        for slot in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(slot,), name=f"queue-worker-{slot}")
+            thread.start()
+            threads.append(thread)
+        logger.info(f"Worker {self.name} consuming {', '.join(self.queues)} with {self.concurrency} slots")
+        while any(t.is_alive() for t in threads):
+            for thread in threads:
+                thread.join(timeout=1.0)
+
+# Global instance
+db_job_queue = DatabaseJobQueue(
+    lease_seconds=float(os.getenv("QUEUE_LEASE_SECONDS", "60")),
+    aging_weight=float(os.getenv("SCHEDULER_AGING_WEIGHT", "1.0")),
+)
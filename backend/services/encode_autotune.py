@@ -0,0 +1,263 @@
+"""
+Encode Autotuner
+Picks the cheapest x264 preset/CRF that still meets a quality floor. A few
+short segments are encoded at each candidate setting and scored with SSIM and
+PSNR outside the watermark ROI (where delogo changes the picture anyway),
+plus encode speed. The choice is cached per source family (codec, resolution,
+frame rate), so the tuning cost is paid rarely.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.filters import box_filter
+from services.media_probe import probe_media
+
+logger = logging.getLogger(__name__)
+
+# (preset, crf), cheapest first
+CANDIDATE_PROFILES: List[Tuple[str, int]] = [
+    ("veryfast", 23),
+    ("veryfast", 20),
+    ("faster", 20),
+    ("fast", 19),
+    ("medium", 18),
+]
+
+# Fixed settings used before autotuning existed, and whenever tuning fails
+DEFAULT_PROFILE: Tuple[str, int] = ("medium", 18)
+
+# Scoring resolution; SSIM/PSNR are compared on downscaled luma
+SCORE_MAX_WIDTH = 640
+
+
+def ssim(reference: np.ndarray, candidate: np.ndarray, valid: np.ndarray, window: int = 7) -> float:
+    """Mean SSIM of two (H, W) luma frames over the ``valid`` pixels"""
+    x = reference.astype(np.float32)
+    y = candidate.astype(np.float32)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+    mu_x, mu_y = box_filter(x, window), box_filter(y, window)
+    sxx = box_filter(x * x, window) - mu_x * mu_x
+    syy = box_filter(y * y, window) - mu_y * mu_y
+    sxy = box_filter(x * y, window) - mu_x * mu_y
+
+    score = ((2 * mu_x * mu_y + c1) * (2 * sxy + c2)) / ((mu_x * mu_x + mu_y * mu_y + c1) * (sxx + syy + c2))
+    return float(score[valid].mean())
+
+
+def psnr(reference: np.ndarray, candidate: np.ndarray, valid: np.ndarray) -> float:
+    """PSNR in dB of two (H, W) luma frames over the ``valid`` pixels"""
+    diff = reference[valid].astype(np.float32) - candidate[valid].astype(np.float32)
+    mse = float(np.mean(diff * diff))
+    return 100.0 if mse == 0 else 10.0 * np.log10(255.0 ** 2 / mse)
+
+
+def source_family(info: Dict) -> str:
+    """Cache key grouping sources that should encode alike"""
+    fps = int(round(info.get("fps") or 0))
+    return f"{info.get('codec') or 'unknown'}-{info.get('width')}x{info.get('height')}-{fps}fps"
+
+
+class EncodeAutotuner:
+    def __init__(
+        self,
+        quality_floor: float = 0.98,
+        psnr_floor: float = 38.0,
+        segments: int = 3,
+        segment_seconds: float = 2.0,
+    ):
+        self.quality_floor = quality_floor
+        self.psnr_floor = psnr_floor
+        self.segments = segments
+        self.segment_seconds = segment_seconds
+        self.cache_path = os.path.join("local_storage", "encode_profiles.json")
+        self._profiles: Optional[Dict[str, Dict]] = None
+        # Guards _profiles, _tuning and the cache file; never held while encoding
+        self._lock = threading.Lock()
+        # Families being tuned, set when their tuning finishes either way
+        self._tuning: Dict[str, threading.Event] = {}
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._profiles is None:
+            try:
+                with open(self.cache_path) as f:
+                    self._profiles = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._profiles = {}
+        return self._profiles
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._profiles, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def cached_profile(self, info: Dict) -> Optional[Tuple[str, int]]:
+        """Profile already tuned for this source family, without tuning"""
+        with self._lock:
+            cached = self._load().get(source_family(info))
+        return (cached["preset"], int(cached["crf"])) if cached else None
+
+    def choose(
+        self,
+        input_path: str,
+        filter_chain: Optional[str],
+        watermarks: List[Dict],
+        info: Optional[Dict] = None,
+    ) -> Tuple[str, int]:
+        """Return (preset, crf) for ``input_path``, tuning its family on first use.
+
+        ``info`` is the source's probe_media result when the caller already
+        has it (e.g. from the media catalog).
+        """
+        if info is None:
+            try:
+                info = probe_media(input_path)
+            except RuntimeError as e:
+                logger.warning(f"Autotune probe failed, using default profile: {e}")
+                return DEFAULT_PROFILE
+
+        family = source_family(info)
+        with self._lock:
+            cached = self._load().get(family)
+            if cached:
+                return cached["preset"], int(cached["crf"])
+            in_flight = self._tuning.get(family)
+            if in_flight is None:
+                self._tuning[family] = threading.Event()
+
+        if in_flight is not None:
+            # Another job is tuning this family; use its result when it lands
+            in_flight.wait()
+            return self.cached_profile(info) or DEFAULT_PROFILE
+
+        try:
+            profile = self._tune(input_path, info, filter_chain, watermarks)
+        except Exception as e:
+            logger.warning(f"Autotune failed for {family}, using default profile: {e}")
+            profile = None
+
+        with self._lock:
+            if profile is not None:
+                self._profiles[family] = profile
+                self._save()
+            self._tuning.pop(family).set()
+
+        if profile is None:
+            return DEFAULT_PROFILE
+        logger.info(f"Autotuned {family}: {profile}")
+        return profile["preset"], int(profile["crf"])
+
+    def _tune(self, input_path: str, info: Dict, filter_chain: Optional[str], watermarks: List[Dict]) -> Dict:
+        duration = info.get("duration") or 0.0
+        seg = min(self.segment_seconds, duration) if duration else self.segment_seconds
+        starts = [max(0.0, duration * (i + 0.5) / self.segments - seg / 2) for i in range(self.segments)]
+
+        width, height = info["width"], info["height"]
+        score_w = min(SCORE_MAX_WIDTH, width) & ~1
+        score_h = max(2, int(height * score_w / float(width)) & ~1)
+        valid = self._valid_mask(watermarks, width, score_w, score_h)
+
+        results = {profile: {"ssim": [], "psnr": [], "seconds": 0.0} for profile in CANDIDATE_PROFILES}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for index, start in enumerate(starts):
+                reference = os.path.join(tmp_dir, f"ref{index}.mkv")
+                self._encode_reference(input_path, start, seg, filter_chain, reference)
+                ref_frames = self._decode_luma(reference, score_w, score_h)
+
+                for preset, crf in CANDIDATE_PROFILES:
+                    encoded = os.path.join(tmp_dir, f"enc{index}_{preset}_{crf}.mp4")
+                    elapsed = self._encode_candidate(reference, preset, crf, encoded)
+                    frames = self._decode_luma(encoded, score_w, score_h)
+                    count = min(len(frames), len(ref_frames))
+                    stats = results[(preset, crf)]
+                    stats["seconds"] += elapsed
+                    stats["ssim"] += [ssim(ref_frames[i], frames[i], valid) for i in range(count)]
+                    stats["psnr"] += [psnr(ref_frames[i], frames[i], valid) for i in range(count)]
+
+        summary = []
+        for (preset, crf), stats in results.items():
+            summary.append({
+                "preset": preset,
+                "crf": crf,
+                "ssim": float(np.mean(stats["ssim"])) if stats["ssim"] else 0.0,
+                "psnr": float(np.mean(stats["psnr"])) if stats["psnr"] else 0.0,
+                "encode_seconds": stats["seconds"],
+            })
+
+        passing = [s for s in summary if s["ssim"] >= self.quality_floor and s["psnr"] >= self.psnr_floor]
+        if passing:
+            best = min(passing, key=lambda s: s["encode_seconds"])
+        else:
+            # Nothing meets the floor: fall back to the highest quality candidate
+            best = max(summary, key=lambda s: s["ssim"])
+        best = dict(best)
+        best["tuned_at"] = datetime.utcnow().isoformat()
+        return best
+
+    def _valid_mask(self, watermarks: List[Dict], width: int, score_w: int, score_h: int) -> np.ndarray:
+        """Pixels outside every watermark rectangle, at scoring resolution"""
+        valid = np.ones((score_h, score_w), dtype=bool)
+        scale = score_w / float(width)
+        for wm in watermarks:
+            try:
+                x, y = float(wm.get("x", 0)) * scale, float(wm.get("y", 0)) * scale
+                w, h = float(wm.get("width", 0)) * scale, float(wm.get("height", 0)) * scale
+            except (TypeError, ValueError):
+                continue
+            valid[max(0, int(y)):int(np.ceil(y + h)), max(0, int(x)):int(np.ceil(x + w))] = False
+        if not valid.any():
+            valid[...] = True
+        return valid
+
+    def _run(self, cmd: List[str]) -> subprocess.CompletedProcess:
+        return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+    def _encode_reference(self, input_path: str, start: float, seconds: float, filter_chain: Optional[str], out_path: str) -> None:
+        """Cut a segment, apply the job's filters and store it losslessly"""
+        ffmpeg_bin = os.getenv("FFMPEG_BIN", "ffmpeg")
+        cmd = [ffmpeg_bin, "-y", "-v", "error", "-ss", f"{start:.3f}", "-t", f"{seconds:.3f}", "-i", input_path]
+        if filter_chain:
+            cmd += ["-vf", filter_chain]
+        cmd += ["-an", "-c:v", "libx264", "-preset", "ultrafast", "-qp", "0", out_path]
+        self._run(cmd)
+
+    def _encode_candidate(self, reference: str, preset: str, crf: int, out_path: str) -> float:
+        ffmpeg_bin = os.getenv("FFMPEG_BIN", "ffmpeg")
+        cmd = [
+            ffmpeg_bin, "-y", "-v", "error", "-i", reference,
+            "-an", "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+            out_path,
+        ]
+        started = time.perf_counter()
+        self._run(cmd)
+        return time.perf_counter() - started
+
+    def _decode_luma(self, path: str, width: int, height: int) -> np.ndarray:
+        ffmpeg_bin = os.getenv("FFMPEG_BIN", "ffmpeg")
+        cmd = [
+            ffmpeg_bin, "-v", "error", "-i", path,
+            "-vf", f"scale={width}:{height}",
+            "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1",
+        ]
+        data = self._run(cmd).stdout
+        frame_bytes = width * height
+        count = len(data) // frame_bytes
+        return np.frombuffer(data[:count * frame_bytes], dtype=np.uint8).reshape(count, height, width)
+
+# Global instance
+encode_autotuner = EncodeAutotuner(
+    quality_floor=float(os.getenv("ENCODE_SSIM_FLOOR", "0.98")),
+    psnr_floor=float(os.getenv("ENCODE_PSNR_FLOOR", "38")),
+)
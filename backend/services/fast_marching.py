@@ -0,0 +1,290 @@
+"""
+Fast-marching (Telea-style) inpainting
+The boundary distance and fill order are solved once per mask; every frame
+that shares the mask is then filled with band-by-band gathers over the ROI.
+"""
+
+import hashlib
+import heapq
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_KNOWN = 0
+_BAND = 1
+_INSIDE = 2
+
+
+def _solve(t: np.ndarray, y1: int, x1: int, y2: int, x2: int) -> float:
+    """First-order Eikonal update of one pixel from two neighbours"""
+    a, b = t[y1, x1], t[y2, x2]
+    if np.isinf(a) and np.isinf(b):
+        return np.inf
+    if np.isinf(a) or np.isinf(b):
+        return 1.0 + min(a, b)
+    d = 2.0 - (a - b) ** 2
+    if d > 0.0:
+        r = np.sqrt(d)
+        s = (a + b - r) / 2.0
+        if s >= a and s >= b:
+            return s
+        s += r
+        if s >= a and s >= b:
+            return s
+    return 1.0 + min(a, b)
+
+
+def _update(t: np.ndarray, y: int, x: int) -> float:
+    """Smallest Eikonal solution at (y, x) over its four neighbour pairs"""
+    h, w = t.shape
+    # Neighbour indices outside the frame read as the pixel itself
+    ym, yp = max(y - 1, 0), min(y + 1, h - 1)
+    xm, xp = max(x - 1, 0), min(x + 1, w - 1)
+    return min(
+        _solve(t, ym, x, y, xm),
+        _solve(t, yp, x, y, xm),
+        _solve(t, ym, x, y, xp),
+        _solve(t, yp, x, y, xp),
+    )
+
+
+def boundary_distance(inside: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """March inwards from the mask boundary.
+
+    Returns the arrival time T (0 outside the mask) and the masked pixel
+    coordinates in the order they were frozen.
+    """
+    h, w = inside.shape
+    t = np.where(inside, np.inf, 0.0)
+    flag = np.where(inside, _INSIDE, _KNOWN).astype(np.uint8)
+
+    seeds = []
+    ys, xs = np.nonzero(inside)
+    for y, x in zip(ys.tolist(), xs.tolist()):
+        for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+            if 0 <= ny < h and 0 <= nx < w and flag[ny, nx] == _KNOWN:
+                seeds.append((y, x))
+                break
+
+    # Seed at the true distance (1, or 1/sqrt(2) in a corner) rather than 1.0,
+    # so no later update lowers a seed below values already popped and the
+    # pop order stays sorted by T.
+    heap = []
+    for y, x in seeds:
+        value = _update(t, y, x)
+        t[y, x] = value
+        flag[y, x] = _BAND
+        heapq.heappush(heap, (value, y, x))
+
+    order = []
+    while heap:
+        value, y, x = heapq.heappop(heap)
+        if flag[y, x] == _KNOWN or value > t[y, x]:
+            continue
+        flag[y, x] = _KNOWN
+        order.append((y, x))
+        for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+            if not (0 <= ny < h and 0 <= nx < w) or flag[ny, nx] == _KNOWN:
+                continue
+            best = _update(t, ny, nx)
+            if best < t[ny, nx]:
+                t[ny, nx] = best
+                flag[ny, nx] = _BAND
+                heapq.heappush(heap, (best, ny, nx))
+
+    return t, np.array(order, dtype=np.intp).reshape(-1, 2)
+
+
+def mask_key(mask: np.ndarray) -> bytes:
+    """Content hash of a mask, used to key per-mask caches"""
+    key = hashlib.blake2b(np.ascontiguousarray(mask), digest_size=16)
+    key.update(repr((mask.shape, mask.dtype.str)).encode())
+    return key.digest()
+
+
+class FillPlan:
+    """Precomputed fill order and neighbour weights for one mask"""
+
+    def __init__(
+        self,
+        roi: Tuple[int, int, int, int],
+        rows: np.ndarray,
+        cols: np.ndarray,
+        pixels: np.ndarray,
+        neighbours: np.ndarray,
+        weights: np.ndarray,
+        bands: np.ndarray,
+    ):
+        self.roi = roi  # y1, y2, x1, x2
+        self.rows = rows  # ROI coordinates of each masked pixel, fill order
+        self.cols = cols
+        self.pixels = pixels  # flat ROI index of each masked pixel, fill order
+        self.neighbours = neighbours  # (n, k) flat ROI indices
+        self.weights = weights  # (n, k) float32, rows sum to 1
+        self.bands = bands  # start offsets of independent fill bands, plus n
+
+    @property
+    def size(self) -> int:
+        return int(self.pixels.size)
+
+
+def build_fill_plan(mask: np.ndarray, radius: int = 5) -> Optional[FillPlan]:
+    """Solve boundary distance and fill order for ``mask`` (non-zero = fill)"""
+    ys, xs = np.nonzero(mask)
+    if ys.size == 0:
+        return None
+
+    h, w = mask.shape
+    y1, y2 = max(0, ys.min() - radius), min(h, ys.max() + radius + 1)
+    x1, x2 = max(0, xs.min() - radius), min(w, xs.max() + radius + 1)
+    inside = mask[y1:y2, x1:x2] > 0
+    rh, rw = inside.shape
+
+    t, order = boundary_distance(inside)
+    # Masked pixels unreachable from any known pixel (mask covers the frame)
+    if order.shape[0] != int(inside.sum()):
+        logger.warning("Fast-marching mask has no known boundary; leaving it unfilled")
+        return None
+
+    # Pixels in band b only read known pixels or pixels from bands < b, so
+    # each band is one vectorised gather. Bands must not decrease along the
+    # fill order, or a band would start before the pixels it reads are filled.
+    band = np.full(inside.shape, -1, dtype=np.int64)
+    band[order[:, 0], order[:, 1]] = np.maximum.accumulate(
+        np.floor(t[order[:, 0], order[:, 1]]).astype(np.int64)
+    )
+
+    oy, ox = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+    keep = (oy ** 2 + ox ** 2 <= radius ** 2) & ((oy != 0) | (ox != 0))
+    oy, ox = oy[keep], ox[keep]
+
+    py, px = order[:, 0], order[:, 1]
+    qy = py[:, None] + oy[None, :]
+    qx = px[:, None] + ox[None, :]
+    valid = (qy >= 0) & (qy < rh) & (qx >= 0) & (qx < rw)
+    qy_c, qx_c = np.clip(qy, 0, rh - 1), np.clip(qx, 0, rw - 1)
+
+    dist2 = (oy ** 2 + ox ** 2).astype(np.float32)[None, :]
+    tp = t[py, px][:, None]
+    tq = t[qy_c, qx_c]
+    reach = ((1.0 / dist2) * (1.0 / (1.0 + np.abs(tq - tp)))).astype(np.float32)
+
+    while True:
+        pband = band[py, px][:, None]
+        qband = band[qy_c, qx_c]
+        weights = np.where(valid & ((qband < 0) | (qband < pband)), reach, 0.0).astype(np.float32)
+        totals = weights.sum(axis=1)
+        orphans = totals == 0
+        if not orphans.any():
+            break
+        # Nothing known or filled earlier in reach: fill these in a band after
+        # the rest, then recheck, as pixels that read them may now be orphans
+        last = band.max()
+        if np.array_equal(orphans, pband[:, 0] == last):
+            # The whole last band is stranded; moving it again changes nothing
+            logger.warning(f"Fast-marching left {int(orphans.sum())} pixels without known neighbours")
+            totals[orphans] = 1.0
+            break
+        band[py[orphans], px[orphans]] = last + 1
+
+    # Keep the fill order sorted by band
+    resort = np.argsort(band[py, px], kind="stable")
+    py, px, qy_c, qx_c = py[resort], px[resort], qy_c[resort], qx_c[resort]
+    weights, totals = weights[resort], totals[resort]
+    weights /= totals[:, None]
+
+    band_ids = band[py, px]
+    starts = np.flatnonzero(np.diff(band_ids)) + 1
+    bands = np.concatenate(([0], starts, [band_ids.size])).astype(np.intp)
+
+    return FillPlan(
+        roi=(int(y1), int(y2), int(x1), int(x2)),
+        rows=py,
+        cols=px,
+        pixels=(py * rw + px).astype(np.intp),
+        neighbours=(qy_c * rw + qx_c).astype(np.intp),
+        weights=weights,
+        bands=bands,
+    )
+
+
+class FastMarchingInpainter:
+    """Telea-style inpainting with an LRU cache of fill plans keyed by mask"""
+
+    def __init__(self, radius: int = 5, cache_size: int = 8):
+        self.radius = radius
+        self.cache_size = cache_size
+        self._plans: "OrderedDict[bytes, Optional[FillPlan]]" = OrderedDict()
+
+    def plan(self, mask: np.ndarray) -> Optional[FillPlan]:
+        digest = mask_key(mask)
+        if digest in self._plans:
+            self._plans.move_to_end(digest)
+            return self._plans[digest]
+
+        fill_plan = build_fill_plan(mask, self.radius)
+        self._plans[digest] = fill_plan
+        if len(self._plans) > self.cache_size:
+            self._plans.popitem(last=False)
+        return fill_plan
+
+    def inpaint(self, frame: np.ndarray, mask: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Fill masked pixels of a (H, W) or (H, W, C) uint8 frame"""
+        if out is None:
+            out = frame.copy()
+        elif out is not frame:
+            np.copyto(out, frame)
+
+        fill_plan = self.plan(mask)
+        if fill_plan is None:
+            return out
+
+        y1, y2, x1, x2 = fill_plan.roi
+        roi = out[y1:y2, x1:x2]
+        channels = roi.shape[2] if roi.ndim == 3 else 1
+        filled = _run_plan(fill_plan, roi.reshape(-1, channels).astype(np.float32))
+        if roi.ndim == 2:
+            filled = filled[:, 0]
+        # roi is a strided view, so write through 2D indices rather than a reshape
+        roi[fill_plan.rows, fill_plan.cols] = filled.astype(roi.dtype)
+        return out
+
+    def inpaint_batch(self, frames: np.ndarray, mask: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Fill an (N, H, W, C) batch sharing one (H, W) mask.
+
+        Frames and channels are stacked along the value axis, so every band
+        is still a single gather for the whole batch.
+        """
+        if out is None:
+            out = frames.copy()
+        elif out is not frames:
+            np.copyto(out, frames)
+
+        fill_plan = self.plan(mask)
+        if fill_plan is None:
+            return out
+
+        y1, y2, x1, x2 = fill_plan.roi
+        roi = out[:, y1:y2, x1:x2]
+        n, rh, rw, channels = roi.shape
+        values = np.moveaxis(roi, 0, 2).reshape(rh * rw, n * channels).astype(np.float32)
+        filled = _run_plan(fill_plan, values).reshape(-1, n, channels)
+        roi[:, fill_plan.rows, fill_plan.cols] = np.moveaxis(filled, 1, 0).astype(roi.dtype)
+        return out
+
+
+def _run_plan(fill_plan: FillPlan, values: np.ndarray) -> np.ndarray:
+    """Fill (pixels, values) float32 ROI data band by band; return rounded fills"""
+    for start, end in zip(fill_plan.bands[:-1], fill_plan.bands[1:]):
+        gathered = values[fill_plan.neighbours[start:end]]
+        values[fill_plan.pixels[start:end]] = np.einsum(
+            "nk,nkc->nc", fill_plan.weights[start:end], gathered
+        )
+
+    filled = np.rint(values[fill_plan.pixels])
+    np.clip(filled, 0, 255, out=filled)
+    return filled
@@ -0,0 +1,167 @@
+"""
+Frame Sampler
+Pulls a few representative frames (keyframes or evenly spaced frames) straight
+into numpy arrays via an ffmpeg rawvideo pipe. Results are cached per input
+content hash so the detector, previews and UI thumbnails share one extraction.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import subprocess
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from services.media_probe import probe_media
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_MODES = ("keyframes", "even")
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Streaming content hash of a file"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _output_size(width: int, height: int, max_side: Optional[int]) -> Tuple[int, int]:
+    if not max_side or max(width, height) <= max_side:
+        return width, height
+    scale = max_side / float(max(width, height))
+    # Keep dimensions even for yuv-friendly scaling
+    return max(2, int(width * scale) & ~1), max(2, int(height * scale) & ~1)
+
+
+class FrameSampler:
+    def __init__(self, cache_size: int = 16):
+        self.cache_dir = os.path.join("local_storage", "frame_samples")
+        self.cache_size = cache_size
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # (realpath, size, mtime_ns) -> content hash, so cache hits skip rereading the file
+        self._hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+
+    @staticmethod
+    def _hash_key(input_path: str) -> Tuple[str, int, int]:
+        stat = os.stat(input_path)
+        return os.path.realpath(input_path), stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _sample_key(digest: str, count: int, mode: str, max_side: Optional[int]) -> str:
+        return f"{digest}_{mode}_{count}_{max_side or 0}"
+
+    def _content_hash(self, input_path: str) -> str:
+        """file_hash of ``input_path``, recomputed only when the file changes"""
+        key = self._hash_key(input_path)
+        digest = self._hashes.get(key)
+        if digest is None:
+            digest = self._hashes[key] = file_hash(input_path)
+            if len(self._hashes) > self.cache_size * 8:
+                self._hashes.popitem(last=False)
+        else:
+            self._hashes.move_to_end(key)
+        return digest
+
+    def is_cached(self, input_path: str, count: int = 8, mode: str = "keyframes", max_side: Optional[int] = None) -> bool:
+        """True when ``sample`` would neither hash nor decode ``input_path``"""
+        digest = self._hashes.get(self._hash_key(input_path))
+        if digest is None:
+            return False
+        key = self._sample_key(digest, count, mode, max_side)
+        return key in self._memory or os.path.exists(os.path.join(self.cache_dir, f"{key}.npy"))
+
+    def _read_frame(self, input_path: str, timestamp: float, size: Tuple[int, int], keyframe: bool) -> Optional[np.ndarray]:
+        """Decode a single RGB frame at ``timestamp`` into a numpy array"""
+        width, height = size
+        ffmpeg_bin = os.getenv("FFMPEG_BIN", "ffmpeg")
+        cmd = [ffmpeg_bin, "-v", "error", "-ss", f"{timestamp:.3f}"]
+        if keyframe:
+            # Land on the keyframe before the timestamp and decode only that
+            cmd += ["-noaccurate_seek", "-skip_frame", "nokey"]
+        cmd += [
+            "-i", input_path,
+            "-frames:v", "1",
+            "-vf", f"scale={width}:{height}",
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "pipe:1",
+        ]
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+        frame_bytes = width * height * 3
+        if proc.returncode != 0 or len(proc.stdout) < frame_bytes:
+            logger.warning(f"Frame sample at {timestamp:.3f}s failed for {input_path}")
+            return None
+        return np.frombuffer(proc.stdout[:frame_bytes], dtype=np.uint8).reshape(height, width, 3)
+
+    def sample(
+        self,
+        input_path: str,
+        count: int = 8,
+        mode: str = "keyframes",
+        max_side: Optional[int] = None,
+    ) -> np.ndarray:
+        """Return up to ``count`` frames as an (N, H, W, 3) uint8 array.
+
+        mode="keyframes" seeks to evenly spaced timestamps and decodes only the
+        keyframe at or before each; mode="even" decodes the exact frames.
+        """
+        if mode not in SAMPLE_MODES:
+            raise ValueError(f"Unknown sample mode: {mode}")
+
+        key = self._sample_key(self._content_hash(input_path), count, mode, max_side)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        cache_path = os.path.join(self.cache_dir, f"{key}.npy")
+        if os.path.exists(cache_path):
+            frames = np.load(cache_path)
+        else:
+            frames = self._extract(input_path, count, mode, max_side)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, frames)
+            os.replace(tmp_path, cache_path)
+
+        self._memory[key] = frames
+        if len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+        return frames
+
+    def _extract(self, input_path: str, count: int, mode: str, max_side: Optional[int]) -> np.ndarray:
+        info = probe_media(input_path)
+        width, height, duration = info["width"], info["height"], info["duration"] or 0.0
+        size = _output_size(width, height, max_side)
+
+        # Sample the midpoints of count equal slices of the timeline
+        timestamps = [duration * (i + 0.5) / count for i in range(count)] if duration > 0 else [0.0]
+        frames = []
+        for timestamp in timestamps:
+            frame = self._read_frame(input_path, timestamp, size, keyframe=(mode == "keyframes"))
+            if frame is not None:
+                frames.append(frame)
+
+        if not frames:
+            raise RuntimeError("Could not decode any frames from video")
+        logger.info(f"Sampled {len(frames)} {mode} frames from {input_path}")
+        return np.stack(frames)
+
+    def thumbnail_jpeg(self, input_path: str, index: int = 0, max_side: int = 320, count: int = 8) -> bytes:
+        """JPEG bytes of one sampled keyframe, sharing the keyframe cache"""
+        from PIL import Image
+
+        frames = self.sample(input_path, count=count, mode="keyframes", max_side=max_side)
+        frame = frames[min(max(index, 0), len(frames) - 1)]
+        buffer = io.BytesIO()
+        Image.fromarray(frame).save(buffer, format="JPEG", quality=85)
+        return buffer.getvalue()
+
+# Global instance
+frame_sampler = FrameSampler()
@@ -0,0 +1,228 @@
+"""
+Job Events
+Pub/sub for job status and progress, feeding the Server-Sent Events
+endpoints so clients stop polling the status routes.
+
+Events are published by whatever runs the job and fanned out to the
+subscribers of that job in this process. With JOB_EVENTS_REDIS_URL (or
+REDIS_URL) set they travel over a Redis channel instead, so events from
+Celery or queue_worker processes reach API processes on other nodes.
+
+Every event gets an increasing id and the last few per job are kept, so a
+client reconnecting with Last-Event-ID is sent what it missed. Ids come from
+one sequence: the Redis counter when distributed, else a per-process one.
+If a Redis publish fails the event is still delivered to this process's
+subscribers, but without an id and without being kept for replay, so it
+can't reorder the Redis sequence.
+
+Without Redis, events never leave the process that published them. That is
+fine for a single API process running the threads backend; with several API
+processes, or with Celery or queue_worker processes, set a Redis URL. The
+SSE endpoints fall back to re-reading the job's status on each heartbeat
+then, so status changes still arrive (late) but progress events don't.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from app.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "job_events"
+SEQUENCE_KEY = "job_events:seq"
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED.value, JobStatus.FAILED.value}
+
+
+class SubscriberLimitError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Too many event stream subscribers")
+        self.retry_after = retry_after
+
+
+class Subscription:
+    """One client's event queue, filled from publisher threads"""
+
+    def __init__(self, job_id: int, loop: asyncio.AbstractEventLoop, max_pending: int = 100):
+        self.job_id = job_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+
+    def _put(self, event: Dict) -> None:
+        if self.queue.full():
+            # A stalled client loses its oldest events, not the newest status
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    def deliver(self, event: Dict) -> None:
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    async def get(self, timeout: float) -> Optional[Dict]:
+        """Next event, or None after ``timeout`` seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class JobEventBus:
+    def __init__(
+        self,
+        max_subscribers: int = 500,
+        history: int = 50,
+        tracked_jobs: int = 1000,
+        redis_url: Optional[str] = None,
+    ):
+        self.max_subscribers = max_subscribers
+        self.history = history
+        self.tracked_jobs = tracked_jobs
+        self.redis_url = redis_url
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._recent: "OrderedDict[int, Deque[Dict]]" = OrderedDict()
+        self._seq = 0
+        self._redis = None
+        self._listener: Optional[threading.Thread] = None
+        self._counters = {"published": 0, "delivered": 0, "rejected_subscribers": 0}
+
+    @property
+    def distributed(self) -> bool:
+        return bool(self.redis_url)
+
+    def _client(self):
+        if self._redis is None:
+            import redis
+
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    def publish(self, job_id: int, event: str, data: Dict) -> None:
+        """Send ``event`` with ``data`` to ``job_id``'s subscribers; never raises"""
+        message = {"job_id": job_id, "event": event, "data": data}
+        if self.redis_url:
+            try:
+                client = self._client()
+                message["id"] = int(client.incr(SEQUENCE_KEY))
+                client.publish(CHANNEL, json.dumps(message))
+                return
+            except Exception as e:
+                logger.warning(f"Redis publish failed, delivering locally without an id: {e}")
+                message["id"] = None
+                self._dispatch(message)
+                return
+        with self._lock:
+            self._seq += 1
+            message["id"] = self._seq
+        self._dispatch(message)
+
+    def _dispatch(self, message: Dict) -> None:
+        job_id = message["job_id"]
+        with self._lock:
+            if message.get("id") is not None:
+                recent = self._recent.get(job_id)
+                if recent is None:
+                    recent = self._recent[job_id] = deque(maxlen=self.history)
+                    while len(self._recent) > self.tracked_jobs:
+                        self._recent.popitem(last=False)
+                else:
+                    self._recent.move_to_end(job_id)
+                recent.append(message)
+            subscribers = list(self._subscribers.get(job_id, ()))
+            self._counters["published"] += 1
+            self._counters["delivered"] += len(subscribers)
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def _listen(self) -> None:
+        """Forward Redis channel messages to local subscribers, reconnecting on errors"""
+        while True:
+            try:
+                pubsub = self._client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                for item in pubsub.listen():
+                    try:
+                        self._dispatch(json.loads(item["data"]))
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning(f"Bad job event on {CHANNEL}: {e}")
+            except Exception as e:
+                logger.warning(f"Job event listener lost Redis, retrying: {e}")
+                self._redis = None
+                time.sleep(2.0)
+
+    def subscribe(self, job_id: int, last_event_id: Optional[int] = None) -> Tuple[Subscription, List[Dict]]:
+        """Register for ``job_id``'s events on the running loop.
+
+        Returns the subscription and the buffered events after
+        ``last_event_id`` (none when it is None). Raises SubscriberLimitError
+        past ``max_subscribers``.
+        """
+        subscription = Subscription(job_id, asyncio.get_running_loop())
+        with self._lock:
+            if sum(len(s) for s in self._subscribers.values()) >= self.max_subscribers:
+                self._counters["rejected_subscribers"] += 1
+                raise SubscriberLimitError(retry_after=5.0)
+            self._subscribers.setdefault(job_id, set()).add(subscription)
+            replay = []
+            if last_event_id is not None:
+                replay = [m for m in self._recent.get(job_id, ()) if m["id"] > last_event_id]
+            if self.redis_url and self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="job-events", daemon=True)
+                self._listener.start()
+        return subscription, replay
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.job_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.job_id]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            snapshot = {
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+                "max_subscribers": self.max_subscribers,
+                "redis": self.distributed,
+            }
+            snapshot.update(self._counters)
+            return snapshot
+
+
+def publish_job_status(job: Job, **extra) -> None:
+    """Publish ``job``'s current status, plus any ``extra`` fields"""
+    data = {
+        "job_id": job.id,
+        "status": job.status.value if job.status else None,
+        "error_message": job.error_message,
+        "has_processed": bool(job.processed_file_path),
+    }
+    data.update(extra)
+    job_events.publish(job.id, "status", data)
+
+
+def publish_job_progress(job_id: int, progress: float) -> None:
+    job_events.publish(job_id, "progress", {"job_id": job_id, "progress": round(min(1.0, max(0.0, progress)), 3)})
+
+
+def format_sse(message: Dict) -> str:
+    """A bus message (or a snapshot without an id) as an SSE frame"""
+    lines = []
+    if message.get("id") is not None:
+        lines.append(f"id: {message['id']}")
+    lines.append(f"event: {message['event']}")
+    lines.append(f"data: {json.dumps(message['data'], default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+# Global instance
+job_events = JobEventBus(
+    max_subscribers=int(os.getenv("MAX_SSE_SUBSCRIBERS", "500")),
+    redis_url=os.getenv("JOB_EVENTS_REDIS_URL", os.getenv("REDIS_URL")) or None,
+)
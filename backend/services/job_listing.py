@@ -0,0 +1,117 @@
+"""
+Job Listing
+Keyset pagination over a user's jobs, newest first. The cursor is the
+(created_at, id) of the last row served, so each page is one range scan on
+the (user_id, created_at, id) index however deep the client pages, and
+jobs created meanwhile never shift rows between pages.
+"""
+
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.models import Job, JobStatus, MediaMetadata
+from app.schemas import Job as JobSchema, MediaMetadata as MediaMetadataSchema
+
+# Fields a listing can project; "media" comes from the catalog table
+JOB_FIELDS = tuple(JobSchema.model_fields)
+COLUMN_FIELDS = tuple(f for f in JOB_FIELDS if f != "media")
+
+
+def encode_cursor(created_at: datetime, job_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{job_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a cursor this module didn't make"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, job_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(job_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Requested projection, or None for every field; raises ValueError for unknown names"""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in JOB_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def parse_statuses(statuses: Optional[str]) -> Optional[List[JobStatus]]:
+    """Status filter from comma-separated values; raises ValueError for unknown ones"""
+    if not statuses:
+        return None
+    names = [s.strip().lower() for s in statuses.split(",") if s.strip()]
+    known = {status.value: status for status in JobStatus}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown statuses: {', '.join(unknown)}")
+    return [known[name] for name in names]
+
+
+def list_jobs_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    statuses: Optional[Sequence[JobStatus]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """One page of ``user_id``'s jobs as JSON-ready dicts, and the next page's cursor"""
+    wanted = list(fields) if fields else list(JOB_FIELDS)
+    # The cursor needs created_at and id even when they aren't requested
+    columns = [c for c in COLUMN_FIELDS if c in wanted or c in ("id", "created_at")]
+
+    # SQLite keeps timestamps as text, with or without fractional seconds
+    # depending on who wrote them, so compare normalized values there; the
+    # ix_jobs_user_created_dt_id expression index keeps that a range scan
+    sqlite = db.bind.dialect.name == "sqlite"
+    created = func.datetime(Job.created_at) if sqlite else Job.created_at
+
+    query = db.query(*[getattr(Job, c) for c in columns]).filter(Job.user_id == user_id)
+    if statuses:
+        query = query.filter(Job.status.in_(list(statuses)))
+    if cursor:
+        created_at, job_id = decode_cursor(cursor)
+        bound = func.datetime(created_at) if sqlite else created_at
+        query = query.filter(or_(created < bound, and_(created == bound, Job.id < job_id)))
+    rows = query.order_by(created.desc(), Job.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    media = {}
+    if "media" in wanted and rows:
+        media = {
+            m.job_id: MediaMetadataSchema.model_validate(m).model_dump(mode="json")
+            for m in db.query(MediaMetadata).filter(MediaMetadata.job_id.in_([r.id for r in rows]))
+        }
+
+    page = []
+    for row in rows:
+        values = dict(zip(columns, row))
+        item = {}
+        for name in wanted:
+            if name == "media":
+                item["media"] = media.get(row.id)
+            else:
+                value = values[name]
+                if isinstance(value, JobStatus):
+                    value = value.value
+                elif isinstance(value, datetime):
+                    value = value.isoformat()
+                item[name] = value
+        page.append(item)
+    return page, next_cursor
@@ -0,0 +1,198 @@
+"""
+Job Leases and Reaper
+A running job holds a lease on its row (jobs.lease_expires_at) that a
+heartbeat thread renews. If the process running it dies, the lease runs out
+and the reaper deletes the partial output and requeues the job, up to
+``max_attempts`` runs; after that the job is marked FAILED. Checkpointed
+segments are kept for the retry, which only encodes the missing ones.
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+
+# Jobs from before leases existed have none; treat them as orphaned after this
+LEGACY_STALE_AFTER = timedelta(hours=6)
+
+
+def renew_lease(db: Session, job_id: int) -> bool:
+    """Push the lease of a PROCESSING job forward; False if the job is no longer leased"""
+    now = datetime.utcnow()
+    renewed = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.status == JobStatus.PROCESSING, Job.lease_expires_at.isnot(None))
+        .update(
+            {
+                Job.heartbeat_at: now,
+                Job.lease_expires_at: now + timedelta(seconds=JOB_LEASE_SECONDS),
+                # Heartbeats are bookkeeping, not a change to the job
+                Job.updated_at: Job.updated_at,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return renewed == 1
+
+
+def lease_held(db: Session, job_id: int) -> bool:
+    """True while ``job_id`` is PROCESSING under a live lease, i.e. some worker is running it"""
+    now = datetime.utcnow()
+    return db.query(Job.id).filter(
+        Job.id == job_id,
+        Job.status == JobStatus.PROCESSING,
+        Job.lease_expires_at.isnot(None),
+        Job.lease_expires_at >= now,
+    ).first() is not None
+
+
+@contextmanager
+def job_heartbeat(job_id: int) -> Iterator[None]:
+    """Renew ``job_id``'s lease every third of the lease period while the block runs"""
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(JOB_LEASE_SECONDS / 3.0):
+            db = SessionLocal()
+            try:
+                if not renew_lease(db, job_id):
+                    logger.warning(f"Job {job_id} lost its lease")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for job {job_id}: {e}")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def remove_partial_output(path: Optional[str]) -> bool:
+    if path and os.path.exists(path):
+        try:
+            os.unlink(path)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not delete partial output {path}: {e}")
+    return False
+
+
+class JobReaper:
+    def __init__(self, max_attempts: int = 3, interval: float = 60.0):
+        self.max_attempts = max_attempts
+        self.interval = interval
+        self.stats: Dict = {
+            "runs": 0,
+            "reaped": 0,
+            "requeued": 0,
+            "failed": 0,
+            "partial_outputs_deleted": 0,
+            "last_run_at": None,
+        }
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def reap(self, db: Session) -> int:
+        """Requeue or fail every PROCESSING job whose lease has expired"""
+        from services.job_events import publish_job_status
+        from services.job_runner import discard_segments, enqueue_job
+
+        now = datetime.utcnow()
+        orphans = (
+            db.query(Job)
+            .filter(
+                Job.status == JobStatus.PROCESSING,
+                Job.processing_started_at.isnot(None),
+                (Job.lease_expires_at < now)
+                | (Job.lease_expires_at.is_(None) & (Job.processing_started_at < now - LEGACY_STALE_AFTER)),
+            )
+            .all()
+        )
+
+        reaped = 0
+        for job in orphans:
+            # Take ownership with a compare-and-set so concurrent reapers don't double-handle
+            lease = Job.lease_expires_at.is_(None) if job.lease_expires_at is None else Job.lease_expires_at == job.lease_expires_at
+            owned = (
+                db.query(Job)
+                .filter(Job.id == job.id, Job.status == JobStatus.PROCESSING, lease)
+                .update({Job.lease_expires_at: now, Job.processing_started_at: None}, synchronize_session=False)
+            )
+            db.commit()
+            if owned != 1:
+                continue
+            db.refresh(job)
+
+            reaped += 1
+            if remove_partial_output(job.partial_output_path):
+                self.stats["partial_outputs_deleted"] += 1
+            job.partial_output_path = None
+            job.lease_expires_at = None
+            job.heartbeat_at = None
+
+            if (job.attempts or 0) >= self.max_attempts:
+                job.status = JobStatus.FAILED
+                job.error_message = f"Processing was interrupted {job.attempts} times"
+                discard_segments(db, job)
+                db.commit()
+                publish_job_status(job)
+                self.stats["failed"] += 1
+                print(f"❌ Job {job.id} failed after {job.attempts} interrupted runs")
+                continue
+
+            db.commit()
+            try:
+                enqueue_job(db, job, force=True)
+                self.stats["requeued"] += 1
+                print(f"🔁 Requeued orphaned job {job.id} (attempt {job.attempts + 1} of {self.max_attempts})")
+            except Exception as e:
+                # Left PROCESSING without a start time: recovered on next startup
+                logger.warning(f"Could not requeue orphaned job {job.id}: {e}")
+
+        self.stats["runs"] += 1
+        self.stats["reaped"] += reaped
+        self.stats["last_run_at"] = now.isoformat()
+        return reaped
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                self.reap(db)
+            except Exception as e:
+                logger.warning(f"Reaper run failed: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+    def start(self) -> None:
+        """Run ``reap`` every ``interval`` seconds on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="job-reaper", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+# Global instance
+job_reaper = JobReaper(
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    interval=float(os.getenv("REAPER_INTERVAL_SECONDS", "60")),
+)
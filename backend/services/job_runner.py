@@ -0,0 +1,347 @@
+"""
+Job Runner
+Runs one processing job end to end and hands jobs to a processing backend,
+chosen by PROCESSING_BACKEND:
+
+- "threads" (default): the in-process scheduler. The pending queue persists
+  through the jobs table: a job marked PROCESSING without a
+  processing_started_at was admitted but not picked up, and is re-queued on
+  startup.
+- "celery": the Celery process_video task on the paid/free/public queue.
+- "db": the job_queue table, drained by ``python queue_worker.py`` processes
+  on any node that can reach the database.
+"""
+
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Job, JobSegment, JobStatus, SubscriptionTier
+from services.cost_model import cost_model
+from services.db_queue import db_job_queue
+from services.job_events import job_events, publish_job_progress, publish_job_status
+from services.media_catalog import media_info
+from services.job_scheduler import Preempted, QueueFullError, RetryLater, job_scheduler
+from services.job_reaper import JOB_LEASE_SECONDS, job_heartbeat, job_reaper, remove_partial_output
+from services.video_processor import process_video_with_delogo, processed_output_path
+
+logger = logging.getLogger(__name__)
+
+
+PUBLIC_USER_EMAIL = "public@sora.local"
+
+# Encode long videos in checkpointed segments of this many seconds (0 disables)
+SEGMENT_SECONDS = float(os.getenv("PROCESSING_SEGMENT_SECONDS", "30"))
+# Kill a segment encode (or the final concat) that runs longer than this (0 disables)
+SEGMENT_TIMEOUT_SECONDS = float(os.getenv("PROCESSING_SEGMENT_TIMEOUT_SECONDS", "900"))
+
+
+# Fair-share weights: a tier's share of the pool relative to free users
+TIER_WEIGHTS = {
+    SubscriptionTier.FREE: 1.0,
+    SubscriptionTier.MONTHLY: 2.0,
+    SubscriptionTier.YEARLY: 3.0,
+}
+
+
+def processing_backend() -> str:
+    return os.getenv("PROCESSING_BACKEND", "threads").lower()
+
+
+def processing_queue(job: Job) -> str:
+    """Celery queue for ``job``: public widget uploads, free tier or paid"""
+    user = job.user
+    if user is None or user.email == PUBLIC_USER_EMAIL:
+        return "public"
+    if user.is_admin or user.subscription_tier != SubscriptionTier.FREE:
+        return "paid"
+    return "free"
+
+
+def segment_dir(job_id: int) -> str:
+    return os.path.join("local_storage", "segments", str(job_id))
+
+
+def discard_segments(db: Session, job: Job) -> None:
+    """Delete a job's checkpointed segments (files and rows); the caller commits"""
+    shutil.rmtree(segment_dir(job.id), ignore_errors=True)
+    db.query(JobSegment).filter(JobSegment.job_id == job.id).delete(synchronize_session=False)
+
+
+def deadline_class(job: Job) -> str:
+    """"interactive" for public widget uploads, whose uploader is watching the page; else "batch" """
+    user = job.user
+    if user is None or user.email == PUBLIC_USER_EMAIL:
+        return "interactive"
+    return "batch"
+
+
+def fair_share_owner(job: Job) -> Tuple[str, float]:
+    """(owner key, weight) for fair sharing.
+
+    Anonymous widget jobs share one database user, so each is its own owner;
+    a fresh interactive upload therefore always starts with no usage.
+    """
+    user = job.user
+    if user is None or user.email == PUBLIC_USER_EMAIL:
+        return f"job:{job.id}", TIER_WEIGHTS[SubscriptionTier.FREE]
+    return f"user:{user.id}", TIER_WEIGHTS.get(user.subscription_tier, 1.0)
+
+
+def run_job(job_id: int) -> Optional[JobStatus]:
+    """Process ``job_id`` with FFmpeg delogo and return its final status.
+
+    The run takes the job's lease first; jobs that are no longer PROCESSING
+    (finished, reset or deleted) or are leased by another live worker are
+    skipped and None is returned, so redelivered work is harmless.
+
+    Under the in-process scheduler a batch job may yield its worker between
+    segments; it then releases its lease, keeps its segments and re-raises
+    Preempted for the scheduler to queue it again.
+
+    A failed run (ffmpeg error or timeout) keeps its segments and is retried
+    until the job has started ``job_reaper.max_attempts`` runs; only then is
+    the job FAILED. The retry is queued by raising RetryLater (threads), by
+    a new task (celery), or by returning PROCESSING so the queue worker
+    releases its entry (db).
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return None
+        # Start time marks when a worker picks the job up, not when it was queued
+        now = datetime.utcnow()
+        out_path = processed_output_path(job.user_id or 0)
+        leased = (
+            db.query(Job)
+            .filter(
+                Job.id == job_id,
+                Job.status == JobStatus.PROCESSING,
+                Job.lease_expires_at.is_(None) | (Job.lease_expires_at < now),
+            )
+            .update(
+                {
+                    Job.processing_started_at: now,
+                    Job.attempts: func.coalesce(Job.attempts, 0) + 1,
+                    Job.heartbeat_at: now,
+                    Job.lease_expires_at: now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    Job.partial_output_path: out_path,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if leased != 1:
+            return None
+        db.refresh(job)
+        publish_job_status(job, started=True)
+
+        # Segments checkpointed by earlier, interrupted attempts
+        completed = {seg.segment_index: (seg.path, seg.fingerprint) for seg in job.segments}
+
+        def record_segment(index: int, start: float, length: float, path: str, fingerprint: str) -> None:
+            db.query(JobSegment).filter(JobSegment.job_id == job_id, JobSegment.segment_index == index).delete()
+            db.add(JobSegment(
+                job_id=job_id,
+                segment_index=index,
+                start_seconds=start,
+                duration_seconds=length,
+                path=path,
+                fingerprint=fingerprint,
+            ))
+            db.commit()
+            if job.media is not None and job.media.duration:
+                publish_job_progress(job_id, (start + length) / job.media.duration)
+
+        # Only the in-process scheduler can put a yielded job back in line
+        should_yield = None
+        if processing_backend() == "threads":
+            should_yield = lambda: job_scheduler.should_yield(job_id)
+
+        try:
+            with job_heartbeat(job.id):
+                process_video_with_delogo(
+                    original_file_path=job.original_file_path,
+                    processed_file_path=job.processed_file_path,
+                    watermark_selections_json=job.watermark_selections,
+                    user_id=job.user_id or 0,
+                    out_path=out_path,
+                    segment_seconds=SEGMENT_SECONDS or None,
+                    segment_dir=segment_dir(job_id),
+                    completed_segments=completed,
+                    on_segment_done=record_segment,
+                    should_yield=should_yield,
+                    media=media_info(job.media),
+                    segment_timeout=SEGMENT_TIMEOUT_SECONDS or None,
+                )
+            job.status = JobStatus.COMPLETED
+            job.processed_file_path = out_path
+            job.processing_completed_at = datetime.utcnow()
+            print(f"✅ Job {job.id} processing completed: {out_path}")
+        except Preempted:
+            # Back to admitted-but-not-started; the yielded run doesn't count as an
+            # attempt, but its run time does count towards the job's processing time
+            remove_partial_output(out_path)
+            job.preempted_seconds = (job.preempted_seconds or 0.0) + (datetime.utcnow() - job.processing_started_at).total_seconds()
+            job.processing_started_at = None
+            job.attempts = max(0, (job.attempts or 1) - 1)
+            job.partial_output_path = None
+            job.lease_expires_at = None
+            db.commit()
+            publish_job_status(job, preempted=True)
+            raise
+        except Exception as e:
+            remove_partial_output(out_path)
+            if (job.attempts or 0) < job_reaper.max_attempts:
+                # Keep the segments so the next run encodes only the missing ones
+                job.processing_started_at = None
+                job.partial_output_path = None
+                job.lease_expires_at = None
+                db.commit()
+                print(f"🔁 Job {job.id} run {job.attempts} of {job_reaper.max_attempts} failed, retrying: {e}")
+                publish_job_status(job, retrying=True)
+                backend = processing_backend()
+                if backend == "threads":
+                    raise RetryLater() from e
+                if backend == "celery":
+                    try:
+                        _submit(db, job, force=True)
+                    except Exception as submit_error:
+                        # Left PROCESSING without a start time, like an unqueued reaper retry
+                        logger.warning(f"Could not requeue job {job.id}: {submit_error}")
+                return job.status
+            job.status = JobStatus.FAILED
+            job.error_message = str(e)
+            print(f"❌ Job {job.id} processing failed: {e}")
+        job.partial_output_path = None
+        job.lease_expires_at = None
+        discard_segments(db, job)
+        db.commit()
+        publish_job_status(job)
+        return job.status
+    finally:
+        db.close()
+
+
+def enqueue_job(db: Session, job: Job, force: bool = False) -> Optional[int]:
+    """Admit ``job`` and return its queue position (None when an external queue owns it).
+
+    Raises QueueFullError when the in-process queue is at its hard cap.
+    """
+    position = _submit(db, job, force)
+    publish_job_status(job, queue_position=position, eta_seconds=queue_eta(job.id))
+    return position
+
+
+def _submit(db: Session, job: Job, force: bool) -> Optional[int]:
+    backend = processing_backend()
+    if backend == "celery":
+        from app.tasks import process_video
+
+        process_video.apply_async(args=[job.id], queue=processing_queue(job))
+        return None
+
+    cost_model.maybe_calibrate(db)
+    predicted = cost_model.predict(job)
+    if backend == "db":
+        depth = db_job_queue.depth(db)
+        if not force and depth["queue_depth"] >= job_scheduler.max_queued:
+            raise QueueFullError(predicted * depth["queue_depth"] / max(1, depth["leased"]))
+        db_job_queue.enqueue(db, job.id, predicted, processing_queue(job))
+        db.commit()
+        return db_job_queue.position(db, job.id)
+
+    job_id = job.id
+    owner, weight = fair_share_owner(job)
+    return job_scheduler.submit(
+        job_id,
+        predicted,
+        lambda: run_job(job_id),
+        force=force,
+        owner=owner,
+        weight=weight,
+        deadline_class=deadline_class(job),
+    )
+
+
+def enqueue_jobs(db: Session, jobs: List[Job]) -> Dict[int, Optional[int]]:
+    """Admit ``jobs`` together: all of them, or none with QueueFullError.
+
+    Returns each job's queue position, as enqueue_job does.
+    """
+    backend = processing_backend()
+    if backend == "db":
+        depth = db_job_queue.depth(db)
+        room = job_scheduler.max_queued - depth["queue_depth"]
+        if len(jobs) > room:
+            cost_model.maybe_calibrate(db)
+            predicted = sum(cost_model.predict(job) for job in jobs) / max(1, len(jobs))
+            raise QueueFullError(predicted * depth["queue_depth"] / max(1, depth["leased"]))
+    elif backend == "threads":
+        room, retry_after = job_scheduler.headroom()
+        if len(jobs) > room:
+            raise QueueFullError(retry_after)
+    return {job.id: enqueue_job(db, job, force=True) for job in jobs}
+
+
+def queue_position(db: Session, job_id: int) -> Optional[int]:
+    """Place of ``job_id`` in the active backend's queue (see JobScheduler.position)"""
+    backend = processing_backend()
+    if backend == "db":
+        return db_job_queue.position(db, job_id)
+    if backend == "threads":
+        return job_scheduler.position(job_id)
+    return None
+
+
+def queue_eta(job_id: int) -> Optional[float]:
+    """Expected seconds until ``job_id`` finishes, where the backend can tell"""
+    if processing_backend() == "threads":
+        return job_scheduler.eta(job_id)
+    return None
+
+
+def queue_metrics(db: Session) -> dict:
+    from services.job_reaper import job_reaper
+
+    backend = processing_backend()
+    metrics = {"backend": backend}
+    if backend == "db":
+        metrics.update(db_job_queue.depth(db))
+    elif backend == "threads":
+        metrics.update(job_scheduler.metrics())
+    metrics["reaper"] = dict(job_reaper.stats)
+    metrics["event_streams"] = job_events.stats()
+    return metrics
+
+
+def recover_queued_jobs() -> int:
+    """Re-queue jobs that were admitted but never started before a restart"""
+    if processing_backend() != "threads":
+        # The broker keeps its own queue
+        return 0
+    db = SessionLocal()
+    try:
+        jobs = (
+            db.query(Job)
+            .filter(Job.status == JobStatus.PROCESSING, Job.processing_started_at.is_(None))
+            .order_by(Job.updated_at)
+            .all()
+        )
+        for job in jobs:
+            enqueue_job(db, job, force=True)
+        if jobs:
+            print(f"🔁 Re-queued {len(jobs)} pending jobs")
+        return len(jobs)
+    except Exception as e:
+        logger.warning(f"Could not recover queued jobs: {e}")
+        return 0
+    finally:
+        db.close()
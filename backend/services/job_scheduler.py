@@ -0,0 +1,366 @@
+"""
+Job Scheduler
+Runs processing jobs on a fixed pool of worker threads.
+
+The next job goes to the owner (user) with the smallest weighted deficit:
+recent worker-seconds used, decayed with a half-life and divided by the
+owner's weight. Among that owner's jobs the one with the least expected work
+starts first, and waiting earns credit (aging) so a long video is not starved
+by a steady stream of short clips:
+
+    owner    = argmin (decayed_seconds_used + seconds_running_now) / weight
+    priority = predicted_seconds - aging_weight * seconds_waited   (lowest first)
+
+A worker never idles while anything is queued, so a heavy user still gets
+the whole pool when nobody else is waiting.
+
+Jobs also carry a soft deadline class. Interactive jobs (someone is waiting
+on the page) are always due, and batch jobs become due once they would miss
+their much later deadline; due jobs run earliest-deadline-first ahead of
+everything else. While a due
+job waits for a worker, running batch jobs yield at their next segment
+boundary (``should_yield``); they raise Preempted and go back in the queue
+keeping their place in line and their finished segments. A run that failed
+but may be retried raises RetryLater and is queued again the same way.
+
+Admission is bounded: past ``max_queued`` waiting jobs, submit raises
+QueueFullError with a Retry-After estimate instead of growing the backlog.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Soft completion targets, seconds after submission
+DEADLINE_TARGETS = {
+    "interactive": float(os.getenv("INTERACTIVE_DEADLINE_SECONDS", "120")),
+    "batch": float(os.getenv("BATCH_DEADLINE_SECONDS", "21600")),
+}
+
+
+class Preempted(Exception):
+    """Raised by a job that yielded its worker at a segment boundary"""
+
+
+class RetryLater(Exception):
+    """Raised by a job whose run failed but kept its segments for another attempt"""
+
+
+def _percentiles(samples) -> Dict:
+    values = sorted(samples)
+    return {
+        "samples": len(values),
+        "p50": round(values[len(values) // 2], 2) if values else None,
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2) if values else None,
+        "max": round(values[-1], 2) if values else None,
+    }
+
+
+class QueueFullError(Exception):
+    """Raised by submit when the pending queue is at its hard cap"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Processing queue is full, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class UsageTracker:
+    """Exponentially decayed worker-seconds per owner"""
+
+    def __init__(self, half_life: float = 600.0):
+        self.half_life = half_life
+        self._usage: Dict[Hashable, Tuple[float, float]] = {}
+
+    def usage(self, owner: Hashable, now: float) -> float:
+        value, stamp = self._usage.get(owner, (0.0, now))
+        return value * 0.5 ** ((now - stamp) / self.half_life)
+
+    def charge(self, owner: Hashable, seconds: float, now: float) -> None:
+        self._usage[owner] = (self.usage(owner, now) + seconds, now)
+        # Forget owners whose usage has decayed to nothing
+        if len(self._usage) > 1000:
+            self._usage = {k: v for k, v in self._usage.items() if self.usage(k, now) > 0.01}
+
+    def snapshot(self, now: float, limit: int = 10) -> Dict[str, float]:
+        top = sorted(((self.usage(k, now), k) for k in self._usage), reverse=True)[:limit]
+        return {str(k): round(v, 1) for v, k in top if v > 0.01}
+
+
+class _Entry:
+    __slots__ = (
+        "job_id", "predicted", "run", "owner", "weight", "deadline_class", "deadline",
+        "enqueued_at", "started_at", "first_started_at", "preemptions",
+    )
+
+    def __init__(
+        self,
+        job_id: int,
+        predicted: float,
+        run: Callable[[], None],
+        owner: Hashable,
+        weight: float,
+        deadline_class: str,
+    ):
+        self.job_id = job_id
+        self.predicted = predicted
+        self.run = run
+        self.owner = owner
+        self.weight = weight
+        self.deadline_class = deadline_class
+        self.enqueued_at = time.monotonic()
+        self.deadline = self.enqueued_at + DEADLINE_TARGETS.get(deadline_class, DEADLINE_TARGETS["batch"])
+        self.started_at: Optional[float] = None
+        self.first_started_at: Optional[float] = None
+        self.preemptions = 0
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        workers: int = 2,
+        aging_weight: float = 1.0,
+        max_queued: Optional[int] = None,
+        usage_half_life: float = 600.0,
+        max_preemptions: int = 3,
+    ):
+        self.workers = max(1, workers)
+        self.aging_weight = aging_weight
+        self.max_queued = max_queued if max_queued is not None else self.workers * 8
+        self.usage = UsageTracker(usage_half_life)
+        self.max_preemptions = max_preemptions
+        self._cond = threading.Condition()
+        self._queued: Dict[int, _Entry] = {}
+        self._running: Dict[int, _Entry] = {}
+        self._threads: List[threading.Thread] = []
+        self._waits: Dict[str, Deque[float]] = {name: deque(maxlen=500) for name in DEADLINE_TARGETS}
+        self._turnaround: Dict[str, Deque[float]] = {name: deque(maxlen=500) for name in DEADLINE_TARGETS}
+        self._counters = {"submitted": 0, "rejected": 0, "completed": 0, "crashed": 0, "preempted": 0, "retried": 0}
+
+    def _priority(self, entry: _Entry, now: float) -> float:
+        return entry.predicted - self.aging_weight * (now - entry.enqueued_at)
+
+    def _due(self, entry: _Entry, now: float) -> bool:
+        """Interactive, or out of slack to finish by its deadline"""
+        return entry.deadline_class == "interactive" or now + entry.predicted >= entry.deadline
+
+    def _ordered(self, now: float) -> List[_Entry]:
+        """Queued entries in the order they would start if nothing else arrived"""
+        due = sorted((e for e in self._queued.values() if self._due(e, now)), key=lambda e: e.deadline)
+        ordered = list(due)
+
+        deficit: Dict[Hashable, float] = {}
+        pending: Dict[Hashable, List[_Entry]] = {}
+        for entry in self._queued.values():
+            if not self._due(entry, now):
+                pending.setdefault(entry.owner, []).append(entry)
+        for owner, entries in pending.items():
+            entries.sort(key=lambda e: (self._priority(e, now), e.enqueued_at), reverse=True)
+            deficit[owner] = self.usage.usage(owner, now) + sum(
+                now - e.started_at for e in self._running.values() if e.owner == owner
+            )
+
+        while pending:
+            owner = min(pending, key=lambda o: (deficit[o] / pending[o][-1].weight, pending[o][-1].enqueued_at))
+            entry = pending[owner].pop()
+            ordered.append(entry)
+            # Expect the owner to be charged for this job before its next one
+            deficit[owner] += entry.predicted
+            if not pending[owner]:
+                del pending[owner]
+        return ordered
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _backlog(self, now: float) -> float:
+        """Predicted seconds of work ahead of a newly queued job"""
+        remaining = sum(max(0.0, e.predicted - (now - e.started_at)) for e in self._running.values())
+        return remaining + sum(e.predicted for e in self._queued.values())
+
+    def submit(
+        self,
+        job_id: int,
+        predicted_seconds: float,
+        run: Callable[[], None],
+        force: bool = False,
+        owner: Optional[Hashable] = None,
+        weight: float = 1.0,
+        deadline_class: str = "batch",
+    ) -> int:
+        """Queue ``run`` for ``job_id`` and return its queue position (0 = starts now).
+
+        ``owner`` groups jobs for fair sharing (default: the job alone) and
+        ``weight`` is that owner's share. ``deadline_class`` is "interactive"
+        or "batch" (see DEADLINE_TARGETS). A job already queued or running is
+        left alone. Raises QueueFullError when ``max_queued`` jobs are
+        waiting, unless ``force`` (used to restore jobs that were admitted
+        before a restart).
+        """
+        with self._cond:
+            if job_id not in self._queued and job_id not in self._running:
+                idle = len(self._running) + len(self._queued) < self.workers
+                if not idle and not force and len(self._queued) >= self.max_queued:
+                    self._counters["rejected"] += 1
+                    raise QueueFullError(self._backlog(time.monotonic()) / self.workers)
+                owner = owner if owner is not None else f"job:{job_id}"
+                self._queued[job_id] = _Entry(
+                    job_id, predicted_seconds, run, owner, max(weight, 1e-3), deadline_class
+                )
+                self._counters["submitted"] += 1
+                self._start_workers()
+                self._cond.notify()
+                logger.info(f"Queued job {job_id} (expected {predicted_seconds:.0f}s)")
+            return self._position(job_id)
+
+    def headroom(self) -> Tuple[int, float]:
+        """(jobs submit would accept right now, Retry-After seconds if that's too few)"""
+        with self._cond:
+            idle = max(0, self.workers - len(self._running) - len(self._queued))
+            room = idle + max(0, self.max_queued - len(self._queued))
+            return room, self._backlog(time.monotonic()) / self.workers
+
+    def _position(self, job_id: int) -> int:
+        if job_id not in self._queued:
+            return 0
+        ordered = self._ordered(time.monotonic())
+        index = next(i for i, e in enumerate(ordered) if e.job_id == job_id)
+        free = max(0, self.workers - len(self._running))
+        return 0 if index < free else index - free + 1
+
+    def position(self, job_id: int) -> Optional[int]:
+        """1-based place among jobs waiting for a worker, 0 if starting or running, None if unknown"""
+        with self._cond:
+            if job_id not in self._queued and job_id not in self._running:
+                return None
+            return self._position(job_id)
+
+    def _next(self) -> _Entry:
+        with self._cond:
+            while not self._queued:
+                self._cond.wait()
+            now = time.monotonic()
+            entry = self._ordered(now)[0]
+            del self._queued[entry.job_id]
+            entry.started_at = now
+            self._running[entry.job_id] = entry
+            if entry.first_started_at is None:
+                entry.first_started_at = now
+                self._waits[entry.deadline_class].append(now - entry.enqueued_at)
+            return entry
+
+    def should_yield(self, job_id: int) -> bool:
+        """True when running batch job ``job_id`` should give its worker to a due job"""
+        with self._cond:
+            entry = self._running.get(job_id)
+            if entry is None or entry.deadline_class == "interactive" or entry.preemptions >= self.max_preemptions:
+                return False
+            now = time.monotonic()
+            if self._due(entry, now):
+                return False
+            waiting_due = sum(1 for e in self._queued.values() if self._due(e, now))
+            if waiting_due == 0 or len(self._running) < self.workers:
+                return False
+            # Yield only as many batch jobs as there are due jobs waiting
+            yielding = sorted(
+                (e for e in self._running.values() if e.deadline_class != "interactive" and not self._due(e, now)),
+                key=lambda e: e.deadline,
+                reverse=True,
+            )[:waiting_due]
+            return entry in yielding
+
+    def _work(self) -> None:
+        while True:
+            entry = self._next()
+            outcome = "completed"
+            try:
+                entry.run()
+            except Preempted:
+                outcome = "preempted"
+            except RetryLater:
+                outcome = "retried"
+            except Exception as e:
+                outcome = "crashed"
+                logger.exception(f"Job {entry.job_id} crashed in scheduler: {e}")
+            finally:
+                with self._cond:
+                    self._running.pop(entry.job_id, None)
+                    self._counters[outcome] += 1
+                    now = time.monotonic()
+                    self.usage.charge(entry.owner, now - entry.started_at, now)
+                    if outcome in ("preempted", "retried"):
+                        # Back in line with its original submission time and deadline
+                        if outcome == "preempted":
+                            entry.preemptions += 1
+                            entry.predicted = max(1.0, entry.predicted - (now - entry.started_at))
+                        entry.started_at = None
+                        self._queued[entry.job_id] = entry
+                        self._cond.notify()
+                        logger.info(f"Job {entry.job_id} {outcome} (preempted {entry.preemptions} times)")
+                    else:
+                        self._turnaround[entry.deadline_class].append(now - entry.enqueued_at)
+
+    def eta(self, job_id: int) -> Optional[float]:
+        """Expected seconds until ``job_id`` finishes; None if it isn't scheduled here.
+
+        Assumes the current priority order holds and work spreads evenly over
+        the workers.
+        """
+        with self._cond:
+            now = time.monotonic()
+            running = self._running.get(job_id)
+            if running is not None:
+                return max(0.0, running.predicted - (now - running.started_at))
+            if job_id not in self._queued:
+                return None
+
+            backlog = sum(max(0.0, e.predicted - (now - e.started_at)) for e in self._running.values())
+            for entry in self._ordered(now):
+                if entry.job_id == job_id:
+                    return backlog / self.workers + entry.predicted
+                backlog += entry.predicted
+        return None
+
+    def metrics(self) -> Dict:
+        """Queue depth, utilisation, admission counters and recent wait times"""
+        with self._cond:
+            now = time.monotonic()
+            waits = [w for samples in self._waits.values() for w in samples]
+            waiting = [now - e.enqueued_at for e in self._queued.values()]
+            snapshot = {
+                "workers": self.workers,
+                "running": len(self._running),
+                "queue_depth": len(self._queued),
+                "max_queued": self.max_queued,
+                "backlog_seconds": round(self._backlog(now), 1),
+                "oldest_wait_seconds": round(max(waiting), 1) if waiting else 0.0,
+                "wait_seconds": _percentiles(waits),
+                "by_class": {
+                    name: {
+                        "queued": sum(1 for e in self._queued.values() if e.deadline_class == name),
+                        "wait_seconds": _percentiles(self._waits[name]),
+                        "time_to_complete_seconds": _percentiles(self._turnaround[name]),
+                    }
+                    for name in DEADLINE_TARGETS
+                },
+            }
+            snapshot.update(self._counters)
+            snapshot["usage_seconds"] = self.usage.snapshot(now)
+            return snapshot
+
+# Global instance
+job_scheduler = JobScheduler(
+    workers=int(os.getenv("PROCESSING_WORKERS", str(os.cpu_count() or 2))),
+    aging_weight=float(os.getenv("SCHEDULER_AGING_WEIGHT", "1.0")),
+    max_queued=int(os.getenv("PROCESSING_QUEUE_LIMIT")) if os.getenv("PROCESSING_QUEUE_LIMIT") else None,
+    usage_half_life=float(os.getenv("FAIR_SHARE_HALF_LIFE_SECONDS", "600")),
+    max_preemptions=int(os.getenv("MAX_PREEMPTIONS", "3")),
+)
@@ -0,0 +1,120 @@
+"""
+Integer luma pyramid and coarse-to-fine watermark detection
+Candidates are found on a 1/16-area image and refined at full resolution
+only inside their neighbourhoods.
+"""
+
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+from services.window_stats import WindowScanner
+
+logger = logging.getLogger(__name__)
+
+# BT.601 luma weights scaled by 256: (77*R + 150*G + 29*B) >> 8
+LUMA_WEIGHTS = (77, 150, 29)
+
+# Below this shorter side a full-resolution scan is already cheap
+PYRAMID_MIN_SIDE = 720
+
+
+def to_luma(frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convert (..., H, W, 3) RGB uint8 frames to (..., H, W) uint8 luma.
+
+    Uses integer weights and accumulates in a single uint16 buffer
+    (max 255 * 256 fits), so no float copy of the frame is ever made.
+    A 2D input is treated as already grayscale.
+    """
+    if frame.ndim == 2:
+        return frame
+
+    shape = frame.shape[:-1]
+    acc = np.empty(shape, dtype=np.uint16)
+    tmp = np.empty(shape, dtype=np.uint16)
+    np.multiply(frame[..., 0], LUMA_WEIGHTS[0], out=acc, dtype=np.uint16)
+    np.multiply(frame[..., 1], LUMA_WEIGHTS[1], out=tmp, dtype=np.uint16)
+    acc += tmp
+    np.multiply(frame[..., 2], LUMA_WEIGHTS[2], out=tmp, dtype=np.uint16)
+    acc += tmp
+    acc >>= 8
+
+    if out is None:
+        out = np.empty(shape, dtype=np.uint8)
+    np.copyto(out, acc, casting="unsafe")
+    return out
+
+
+def downsample2(image: np.ndarray) -> np.ndarray:
+    """Halve both dimensions with a rounded 2x2 integer box average"""
+    h, w = image.shape[0] & ~1, image.shape[1] & ~1
+    acc = image[0:h:2, 0:w:2].astype(np.uint16)
+    acc += image[1:h:2, 0:w:2]
+    acc += image[0:h:2, 1:w:2]
+    acc += image[1:h:2, 1:w:2]
+    acc += 2
+    acc >>= 2
+    return acc.astype(np.uint8)
+
+
+def build_pyramid(gray: np.ndarray, levels: int = 2) -> List[np.ndarray]:
+    """Return [full, 1/4 area, 1/16 area, ...] uint8 luma levels"""
+    pyramid = [gray]
+    for _ in range(levels):
+        if min(pyramid[-1].shape) < 4:
+            break
+        pyramid.append(downsample2(pyramid[-1]))
+    return pyramid
+
+
+def detect_coarse_to_fine(
+    gray: np.ndarray,
+    scanner: WindowScanner,
+    levels: int = 2,
+    margin: float = 0.5,
+    max_candidates: int = 8,
+) -> np.ndarray:
+    """Detect on the coarsest pyramid level, refine candidates at full resolution.
+
+    Each coarse candidate is scaled up, grown by ``margin`` of its size and
+    tightened to the bounding box of rows/columns that hold a run of
+    bright pixels, judged against the neighbourhood's own statistics.
+    """
+    h, w = gray.shape
+    mask = np.zeros((h, w), dtype=np.uint8)
+
+    pyramid = build_pyramid(gray, levels)
+    coarse = pyramid[-1]
+    factor = 1 << (len(pyramid) - 1)
+
+    candidates = scanner.scan(coarse, max_candidates=max_candidates)
+    if not candidates:
+        return mask
+
+    pad = max(2, factor)
+
+    for cx, cy, cw, ch, _ in candidates:
+        grow_x = int(cw * factor * margin)
+        grow_y = int(ch * factor * margin)
+        x1 = max(0, cx * factor - grow_x)
+        y1 = max(0, cy * factor - grow_y)
+        x2 = min(w, (cx + cw) * factor + grow_x)
+        y2 = min(h, (cy + ch) * factor + grow_y)
+
+        roi = gray[y1:y2, x1:x2]
+        threshold = float(roi.mean()) + scanner.bright_sigma * float(roi.std())
+        bright = roi > threshold
+        # Ignore isolated noise pixels when tightening the box
+        rows = np.flatnonzero(bright.sum(axis=1) >= max(2, bright.shape[1] // 50))
+        cols = np.flatnonzero(bright.sum(axis=0) >= max(2, bright.shape[0] // 50))
+        if rows.size == 0 or cols.size == 0:
+            continue
+
+        by1 = max(0, y1 + int(rows[0]) - pad)
+        by2 = min(h, y1 + int(rows[-1]) + 1 + pad)
+        bx1 = max(0, x1 + int(cols[0]) - pad)
+        bx2 = min(w, x1 + int(cols[-1]) + 1 + pad)
+        mask[by1:by2, bx1:bx2] = 255
+
+    return mask
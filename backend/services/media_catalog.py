@@ -0,0 +1,82 @@
+"""
+Media Metadata Catalog
+Probes an uploaded video once and stores the result on its job, so schedulers,
+cost estimators and storage accounting read the database instead of the file.
+"""
+
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import Job, MediaMetadata
+from services.media_probe import probe_keyframe_interval, probe_media
+
+logger = logging.getLogger(__name__)
+
+
+def build_media_metadata(path: str) -> Optional[MediaMetadata]:
+    """Probe ``path`` into an unsaved MediaMetadata row; None if it can't be read"""
+    try:
+        info = probe_media(path)
+    except RuntimeError as e:
+        logger.warning(f"Media probe failed for {path}: {e}")
+        return None
+
+    return MediaMetadata(
+        duration=info["duration"],
+        width=info["width"],
+        height=info["height"],
+        fps=info["fps"],
+        codec=info["codec"],
+        bit_rate=info["bit_rate"],
+        keyframe_interval=probe_keyframe_interval(path),
+        size_bytes=info["size_bytes"],
+    )
+
+
+def catalog_job_media(db: Session, job: Job, path: str) -> Optional[MediaMetadata]:
+    """Attach probed metadata to ``job`` unless it already has some.
+
+    The caller commits; at upload this rides in the same transaction that
+    creates the job.
+    """
+    if job.media is not None:
+        return job.media
+    media = build_media_metadata(path)
+    if media is not None:
+        job.media = media
+    return media
+
+
+def ensure_job_media(db: Session, job: Job, path_resolver) -> Optional[MediaMetadata]:
+    """Return ``job.media``, probing and committing it for jobs uploaded before the catalog.
+
+    ``path_resolver(job)`` maps the job to a local file path.
+    """
+    if job.media is not None:
+        return job.media
+    try:
+        path = path_resolver(job)
+    except Exception as e:
+        logger.warning(f"Media backfill skipped for job {job.id}: {e}")
+        return None
+    media = catalog_job_media(db, job, path)
+    if media is not None:
+        db.commit()
+    return media
+
+
+def media_info(media: Optional[MediaMetadata]) -> Optional[Dict]:
+    """A catalog row in probe_media's shape, or None when it lacks the basics"""
+    if media is None or not (media.duration and media.width and media.height):
+        return None
+    return {
+        "width": media.width,
+        "height": media.height,
+        "duration": media.duration,
+        "fps": media.fps,
+        "codec": media.codec,
+        "bit_rate": media.bit_rate,
+        "size_bytes": media.size_bytes,
+    }
@@ -0,0 +1,104 @@
+"""
+Media probing via ffprobe
+"""
+
+import json
+import logging
+import os
+import subprocess
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_rate(rate: Optional[str]) -> Optional[float]:
+    """Parse an ffprobe rational like "30000/1001" """
+    if not rate or rate in ("0/0", "N/A"):
+        return None
+    try:
+        if "/" in rate:
+            num, den = rate.split("/", 1)
+            return float(num) / float(den) if float(den) else None
+        return float(rate)
+    except ValueError:
+        return None
+
+
+def probe_media(path: str) -> Dict:
+    """Return basic metadata of the first video stream of ``path``.
+
+    Keys: width, height, duration, fps, codec, bit_rate, size_bytes.
+    Missing values are None.
+    """
+    ffprobe_bin = os.getenv("FFPROBE_BIN", "ffprobe")
+    cmd = [
+        ffprobe_bin, "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,codec_name,avg_frame_rate,r_frame_rate,bit_rate"
+                         ":format=duration,bit_rate,size",
+        "-of", "json",
+        path,
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, text=True)
+    except FileNotFoundError as e:
+        raise RuntimeError("FFprobe not found. Install FFmpeg or set FFPROBE_BIN") from e
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"FFprobe failed: {e.stderr[-500:]}" if e.stderr else "FFprobe failed") from e
+
+    info = json.loads(proc.stdout or "{}")
+    streams = info.get("streams") or []
+    if not streams:
+        raise RuntimeError("No video stream found")
+    stream = streams[0]
+    fmt = info.get("format") or {}
+
+    def _num(value, cast):
+        try:
+            return cast(value) if value not in (None, "N/A") else None
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        "width": _num(stream.get("width"), int),
+        "height": _num(stream.get("height"), int),
+        "duration": _num(fmt.get("duration"), float),
+        "fps": _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate")),
+        "codec": stream.get("codec_name"),
+        "bit_rate": _num(stream.get("bit_rate"), int) or _num(fmt.get("bit_rate"), int),
+        "size_bytes": _num(fmt.get("size"), int) or os.path.getsize(path),
+    }
+
+
+def probe_keyframe_interval(path: str, window: float = 30.0) -> Optional[float]:
+    """Mean seconds between video keyframes over the first ``window`` seconds.
+
+    Only packet headers are read, so this is cheap even for long files.
+    """
+    ffprobe_bin = os.getenv("FFPROBE_BIN", "ffprobe")
+    cmd = [
+        ffprobe_bin, "-v", "error",
+        "-select_streams", "v:0",
+        "-read_intervals", f"%+{window:g}",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        path,
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, text=True)
+    except (FileNotFoundError, subprocess.CalledProcessError) as e:
+        logger.warning(f"Keyframe probe failed for {path}: {e}")
+        return None
+
+    times: List[float] = []
+    for line in proc.stdout.splitlines():
+        parts = line.split(",")
+        if len(parts) >= 2 and "K" in parts[1]:
+            try:
+                times.append(float(parts[0]))
+            except ValueError:
+                continue
+    if len(times) < 2:
+        return None
+    times.sort()
+    return (times[-1] - times[0]) / (len(times) - 1)
@@ -0,0 +1,37 @@
+"""
+Rate Limiter
+Sliding-window limits per client key (IP address or user) for endpoints whose
+cost is mostly on a cache miss, such as keyframe thumbnails.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Hashable, Tuple
+
+
+class RateLimiter:
+    def __init__(self, max_calls: int, per_seconds: float, tracked_keys: int = 10000):
+        self.max_calls = max_calls
+        self.per_seconds = per_seconds
+        self.tracked_keys = tracked_keys
+        self._lock = threading.Lock()
+        self._calls: "OrderedDict[Hashable, Deque[float]]" = OrderedDict()
+
+    def acquire(self, key: Hashable) -> Tuple[bool, float]:
+        """Count one call for ``key``; returns (allowed, seconds until the next call is allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            calls = self._calls.get(key)
+            if calls is None:
+                calls = self._calls[key] = deque()
+                while len(self._calls) > self.tracked_keys:
+                    self._calls.popitem(last=False)
+            else:
+                self._calls.move_to_end(key)
+            while calls and calls[0] <= now - self.per_seconds:
+                calls.popleft()
+            if len(calls) >= self.max_calls:
+                return False, calls[0] + self.per_seconds - now
+            calls.append(now)
+            return True, 0.0
@@ -0,0 +1,133 @@
+"""
+Temporal inpainting
+The Sora watermark moves, so pixels it hides in frame t are usually visible
+in frames t±k. Masked pixels are copied from the nearest frame where they are
+unmasked and the surrounding background is stable; only what is left falls
+back to spatial inpainting.
+"""
+
+import logging
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from services.fast_marching import FastMarchingInpainter
+from services.luma_pyramid import to_luma
+from services.window_stats import dilate
+
+logger = logging.getLogger(__name__)
+
+
+class TemporalFiller:
+    """Streaming temporal fill over a bounded ring buffer of decoded frames.
+
+    Frames are pushed in decode order together with their watermark mask.
+    Each frame is emitted once ``radius`` upcoming frames are buffered (or on
+    flush), so at most 2 * radius + 1 frames are held in memory.
+    """
+
+    def __init__(
+        self,
+        radius: int = 4,
+        ring_width: int = 8,
+        max_background_diff: float = 6.0,
+        spatial: Optional[FastMarchingInpainter] = None,
+    ):
+        self.radius = radius
+        self.ring_width = ring_width
+        self.max_background_diff = max_background_diff
+        self.spatial = spatial or FastMarchingInpainter()
+        # Plans for the pixels left after the temporal copy, kept apart from the
+        # shared spatial cache. A static mark leaves the same pixels every frame,
+        # so its plan is solved once.
+        self._leftover = FastMarchingInpainter(radius=self.spatial.radius, cache_size=4)
+        self._buffer: Deque[Tuple[np.ndarray, np.ndarray]] = deque(maxlen=2 * radius + 1)
+        self._center = 0  # buffer index of the next frame to emit
+        self.stats = {"frames": 0, "temporal_pixels": 0, "spatial_pixels": 0}
+
+    def push(self, frame: np.ndarray, mask: np.ndarray) -> List[np.ndarray]:
+        """Buffer a frame; return the frames that became ready (zero or one)"""
+        if len(self._buffer) == self._buffer.maxlen:
+            # Oldest frame was already emitted and is no longer a useful source
+            self._center -= 1
+        self._buffer.append((frame, mask))
+
+        ready = []
+        if len(self._buffer) - 1 - self._center >= self.radius:
+            ready.append(self._fill(self._center))
+            self._center += 1
+        return ready
+
+    def flush(self) -> List[np.ndarray]:
+        """Emit every frame still waiting for lookahead"""
+        ready = []
+        while self._center < len(self._buffer):
+            ready.append(self._fill(self._center))
+            self._center += 1
+        self._buffer.clear()
+        self._center = 0
+        return ready
+
+    def process(self, frames: Iterable[Tuple[np.ndarray, np.ndarray]]) -> Iterator[np.ndarray]:
+        """Fill a whole (frame, mask) stream, yielding frames in order"""
+        for frame, mask in frames:
+            yield from self.push(frame, mask)
+        yield from self.flush()
+
+    def _sources(self, center: int) -> Iterator[int]:
+        """Buffer indices ordered by temporal distance: t-1, t+1, t-2, t+2, ..."""
+        for k in range(1, self.radius + 1):
+            for index in (center - k, center + k):
+                if 0 <= index < len(self._buffer):
+                    yield index
+
+    def _fill(self, center: int) -> np.ndarray:
+        frame, mask = self._buffer[center]
+        self.stats["frames"] += 1
+        inside = mask > 0
+        ys, xs = np.nonzero(inside)
+        if ys.size == 0:
+            return frame
+
+        h, w = inside.shape
+        y1, y2 = max(0, ys.min() - self.ring_width), min(h, ys.max() + self.ring_width + 1)
+        x1, x2 = max(0, xs.min() - self.ring_width), min(w, xs.max() + self.ring_width + 1)
+
+        out = frame.copy()
+        roi_out = out[y1:y2, x1:x2]
+        roi_inside = inside[y1:y2, x1:x2]
+        ring = dilate(roi_inside, self.ring_width) & ~roi_inside
+        roi_luma = to_luma(frame[y1:y2, x1:x2]).astype(np.int16)
+        remaining = roi_inside.copy()
+
+        for index in self._sources(center):
+            source, source_mask = self._buffer[index]
+            source_roi = source[y1:y2, x1:x2]
+            source_clear = source_mask[y1:y2, x1:x2] == 0
+
+            # Background around the mark must match, otherwise the camera or
+            # scene moved and the copied pixels would not line up.
+            common = ring & source_clear
+            if not common.any():
+                continue
+            diff = np.abs(to_luma(source_roi).astype(np.int16) - roi_luma)
+            if float(diff[common].mean()) > self.max_background_diff:
+                continue
+
+            take = remaining & source_clear
+            if take.any():
+                roi_out[take] = source_roi[take]
+                remaining &= ~take
+                if not remaining.any():
+                    break
+
+        spatial_count = int(remaining.sum())
+        self.stats["temporal_pixels"] += int(roi_inside.sum()) - spatial_count
+        self.stats["spatial_pixels"] += spatial_count
+
+        if spatial_count:
+            # Solve only the pixels no neighbour could supply, inside the ROI, so
+            # the temporally filled pixels around them act as known boundary
+            self._leftover.inpaint(roi_out, remaining, out=roi_out)
+        return out
@@ -0,0 +1,126 @@
+"""
+Tiled frame executor
+Splits large frames (4K, tall vertical clips) into cache-sized tiles with a
+halo margin, skips tiles that do not touch the mask and writes processed
+tile cores back in place. Temporaries are bounded by one row of tiles
+instead of the frame size.
+"""
+
+import logging
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from services.window_stats import integral_image
+
+logger = logging.getLogger(__name__)
+
+# kernel(tile_frame, tile_mask) -> processed tile of the same shape
+TileKernel = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+class TiledExecutor:
+    """Run a per-frame kernel tile by tile.
+
+    The output matches a full-frame run only for kernels with a fixed,
+    local reach that ``halo`` covers (1 for a 3x3 median). Kernels with
+    global behaviour, like fast marching, must not be tiled.
+
+    ``stats["peak_bytes"]`` is the most temporary memory a frame needed: the
+    largest tile's input, mask and result plus, in place, the buffered rows
+    of finished cores.
+    """
+
+    def __init__(self, tile_size: int = 256, halo: int = 8):
+        self.tile_size = tile_size
+        self.halo = halo
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Clear counters"""
+        self.stats: Dict[str, int] = {
+            "frames": 0,
+            "tiles_processed": 0,
+            "tiles_skipped": 0,
+            "peak_tile_bytes": 0,
+            "peak_bytes": 0,
+        }
+
+    def tiles(self, shape: Tuple[int, int]) -> Iterator[Tuple[int, int, int, int]]:
+        """Yield (y1, y2, x1, x2) core tile bounds covering a frame"""
+        h, w = shape
+        for y in range(0, h, self.tile_size):
+            for x in range(0, w, self.tile_size):
+                yield y, min(h, y + self.tile_size), x, min(w, x + self.tile_size)
+
+    def run(
+        self,
+        frame: np.ndarray,
+        mask: np.ndarray,
+        kernel: TileKernel,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Process ``frame`` tile by tile into ``out`` (defaults to in place).
+
+        In place, a row of tile results is held back until the next row has
+        read its halos, so every tile sees unprocessed input.
+        """
+        if out is None:
+            out = frame
+        elif out is not frame:
+            np.copyto(out, frame)
+        in_place = out is frame
+        if in_place and self.halo > self.tile_size:
+            raise ValueError("In-place tiling needs halo <= tile_size")
+
+        h, w = mask.shape
+        sat = integral_image(mask > 0)
+        self.stats["frames"] += 1
+
+        pending = []  # (y1, y2, x1, x2, core) of the previous row, not yet written
+        current = []
+        buffered = 0  # bytes of cores in pending and current
+        row = None
+        for y1, y2, x1, x2 in self.tiles((h, w)):
+            if in_place and y1 != row:
+                # This row's halos have all been read; the row before can land
+                self._flush(out, pending)
+                buffered -= sum(entry[4].nbytes for entry in pending)
+                pending, current, row = current, [], y1
+
+            # O(1) "does this tile touch the mask" check from the SAT
+            touched = sat[y2, x2] - sat[y1, x2] - sat[y2, x1] + sat[y1, x1]
+            if not touched:
+                self.stats["tiles_skipped"] += 1
+                continue
+
+            hy1, hy2 = max(0, y1 - self.halo), min(h, y2 + self.halo)
+            hx1, hx2 = max(0, x1 - self.halo), min(w, x2 + self.halo)
+            # When running in place, copy the haloed input so a kernel that
+            # writes to its input cannot touch pixels outside this core.
+            tile = frame[hy1:hy2, hx1:hx2]
+            if in_place:
+                tile = tile.copy()
+            tile_mask = mask[hy1:hy2, hx1:hx2]
+            result = kernel(tile, tile_mask)
+
+            core = result[y1 - hy1:y2 - hy1, x1 - hx1:x2 - hx1]
+            if in_place:
+                current.append((y1, y2, x1, x2, core.copy()))
+                buffered += core.nbytes
+            else:
+                out[y1:y2, x1:x2] = core
+
+            tile_bytes = tile.nbytes + result.nbytes + tile_mask.nbytes
+            self.stats["peak_tile_bytes"] = max(self.stats["peak_tile_bytes"], tile_bytes)
+            self.stats["peak_bytes"] = max(self.stats["peak_bytes"], tile_bytes + buffered)
+            self.stats["tiles_processed"] += 1
+
+        self._flush(out, pending)
+        self._flush(out, current)
+        return out
+
+    @staticmethod
+    def _flush(out: np.ndarray, cores) -> None:
+        for y1, y2, x1, x2, core in cores:
+            out[y1:y2, x1:x2] = core
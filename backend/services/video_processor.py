@@ -1,10 +1,16 @@
 import os
+import hashlib
 import json
 import subprocess
 import uuid
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Callable, List, Dict, Optional, Tuple
 import os
 
+from services.encode_autotune import DEFAULT_PROFILE, encode_autotuner
+from services.job_scheduler import Preempted
+from services.media_probe import probe_media
+
 
 def _search_local_storage_for_file(candidate_keys: List[str]) -> Optional[str]:
     """Best-effort search for a local file matching any candidate key's basename."""
@@ -86,18 +92,8 @@ def build_delogo_filter(watermarks: List[Dict]) -> Optional[str]:
     return filter_chain
 
 
-def process_video_with_delogo(
-    original_file_path: Optional[str],
-    processed_file_path: Optional[str],
-    watermark_selections_json: Optional[str],
-    user_id: int,
-) -> str:
-    """Run ffmpeg to remove watermarks and return the output path.
-
-    Creates backend/local_storage/processed/{user_id}/{uuid}.mp4
-    """
-    input_path = resolve_input_path(original_file_path, processed_file_path, user_id)
-
+def parse_watermark_selections(watermark_selections_json: Optional[str]) -> List[Dict]:
+    """Watermark rectangles from a job's stored selections ({"watermarks": [...]} or a list)"""
     selections: List[Dict] = []
     if watermark_selections_json:
         try:
@@ -108,43 +104,36 @@ def process_video_with_delogo(
                 selections = data
         except Exception:
             selections = []
+    return selections
 
-    filter_chain = build_delogo_filter(selections)
-    # Debug logging of selections and filter used
-    try:
-        print(f"🎯 Watermark selections parsed: {len(selections)} items")
-        if selections:
-            print(f"🔧 delogo filter: {filter_chain}")
-    except Exception:
-        pass
 
-    # Prepare output path
-    out_dir = os.path.join("local_storage", "processed", str(user_id))
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, f"{uuid.uuid4()}.mp4")
+@lru_cache(maxsize=64)
+def compile_watermark_filter(watermark_selections_json: Optional[str]) -> Tuple[Tuple[Dict, ...], Optional[str]]:
+    """(selections, delogo filter chain) for stored selections JSON.
+
+    Cached on the JSON text, so jobs sharing a selection set (a batch)
+    compile it once.
+    """
+    selections = parse_watermark_selections(watermark_selections_json)
+    return tuple(selections), build_delogo_filter(selections)
 
-    # Build ffmpeg command (allow override via env)
-    ffmpeg_bin = os.getenv("FFMPEG_BIN", "ffmpeg")
-    cmd = [
-        ffmpeg_bin,
-        "-y",
-        "-i",
-        input_path,
-    ]
-
-    if filter_chain:
-        cmd += ["-vf", filter_chain]
-
-    # Re-encode video with higher quality settings for better results
-    cmd += [
-        "-c:v", "libx264",
-        "-preset", "medium",  # Better quality than veryfast
-        "-crf", "18",         # Higher quality than 23
-        "-c:a", "aac",
-        "-movflags", "+faststart",
-        out_path,
-    ]
 
+def processed_output_path(user_id: int) -> str:
+    """Fresh output path under local_storage/processed/{user_id}/"""
+    return os.path.join("local_storage", "processed", str(user_id), f"{uuid.uuid4()}.mp4")
+
+
+def plan_segments(duration: float, segment_seconds: float) -> List[Tuple[float, float]]:
+    """(start, length) pairs covering ``duration``; a short tail joins the last segment"""
+    count = max(1, int(duration // segment_seconds))
+    if duration - count * segment_seconds > segment_seconds / 2:
+        count += 1
+    starts = [i * segment_seconds for i in range(count)]
+    return [(start, (starts[i + 1] if i + 1 < count else duration) - start) for i, start in enumerate(starts)]
+
+
+def _run_ffmpeg(cmd: List[str], timeout: Optional[float] = None) -> None:
+    """Run ffmpeg, raising RuntimeError on failure or after ``timeout`` seconds"""
     try:
         print(f"▶️ Running FFmpeg: {' '.join(cmd)}")
         proc = subprocess.run(
@@ -153,6 +142,7 @@ def process_video_with_delogo(
             stderr=subprocess.PIPE,
             check=True,
             text=True,
+            timeout=timeout,
         )
         # Log tail of stderr which includes filter details
         if proc.stderr:
@@ -162,13 +152,142 @@ def process_video_with_delogo(
         raise RuntimeError(
             "FFmpeg not found. Install FFmpeg and ensure it's on PATH, or set FFMPEG_BIN to the full path of ffmpeg.exe"
         ) from e
+    except subprocess.TimeoutExpired as e:
+        # subprocess.run has already killed the process
+        raise RuntimeError(f"FFmpeg timed out after {timeout:.0f}s") from e
     except subprocess.CalledProcessError as e:
         # Surface ffmpeg error
         raise RuntimeError(f"FFmpeg failed: {e.stderr[-1000:]}" if e.stderr else "FFmpeg failed") from e
 
+
+def process_video_with_delogo(
+    original_file_path: Optional[str],
+    processed_file_path: Optional[str],
+    watermark_selections_json: Optional[str],
+    user_id: int,
+    out_path: Optional[str] = None,
+    segment_seconds: Optional[float] = None,
+    segment_dir: Optional[str] = None,
+    completed_segments: Optional[Dict[int, Tuple[str, str]]] = None,
+    on_segment_done: Optional[Callable[[int, float, float, str, str], None]] = None,
+    should_yield: Optional[Callable[[], bool]] = None,
+    media: Optional[Dict] = None,
+    segment_timeout: Optional[float] = None,
+) -> str:
+    """Run ffmpeg to remove watermarks and return the output path.
+
+    Creates backend/local_storage/processed/{user_id}/{uuid}.mp4 unless
+    ``out_path`` is given.
+
+    With ``segment_seconds`` and ``segment_dir``, a video longer than one and
+    a half segments is encoded segment by segment into ``segment_dir`` and
+    then concatenated. ``completed_segments`` maps segment index to
+    (path, fingerprint) from an earlier attempt; those are reused when the
+    file exists and the fingerprint (filter and encoder settings) matches.
+    ``on_segment_done(index, start, length, path, fingerprint)`` is called
+    as each new segment lands, so a crash loses at most one segment.
+    ``should_yield()`` is asked after each new segment while more remain;
+    when it returns True the run stops there and raises Preempted, and a
+    later run resumes from the recorded segments.
+    ``media`` is the source's probe_media result recorded at upload; when
+    given, the source isn't probed again.
+    ``segment_timeout`` bounds each segment encode and the final concat, in
+    seconds; a hung encoder fails the run instead of holding its worker.
+    """
+    input_path = resolve_input_path(original_file_path, processed_file_path, user_id)
+
+    cached_selections, filter_chain = compile_watermark_filter(watermark_selections_json)
+    selections = list(cached_selections)
+    # Debug logging of selections and filter used
+    try:
+        print(f"🎯 Watermark selections parsed: {len(selections)} items")
+        if selections:
+            print(f"🔧 delogo filter: {filter_chain}")
+    except Exception:
+        pass
+
+    # Prepare output path
+    if out_path is None:
+        out_path = processed_output_path(user_id)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    # Re-encode video with higher quality settings for better results;
+    # ENCODE_AUTOTUNE=true picks the cheapest preset/CRF meeting the quality floor
+    preset, crf = DEFAULT_PROFILE
+    if os.getenv("ENCODE_AUTOTUNE", "false").lower() == "true":
+        preset, crf = encode_autotuner.choose(input_path, filter_chain, selections, info=media)
+        print(f"🎛️ Encode profile: preset={preset} crf={crf}")
+    video_args = ["-c:v", "libx264", "-preset", preset, "-crf", str(crf)]
+    filter_args = ["-vf", filter_chain] if filter_chain else []
+
+    # Build ffmpeg command (allow override via env)
+    ffmpeg_bin = os.getenv("FFMPEG_BIN", "ffmpeg")
+
+    segments: List[Tuple[float, float]] = []
+    if segment_seconds and segment_dir:
+        try:
+            duration = (media or probe_media(input_path)).get("duration") or 0.0
+        except RuntimeError as e:
+            print(f"⚠️ Could not probe duration, encoding in one pass: {e}")
+            duration = 0.0
+        if duration > segment_seconds * 1.5:
+            segments = plan_segments(duration, segment_seconds)
+
+    if not segments:
+        cmd = [ffmpeg_bin, "-y", "-i", input_path] + filter_args + video_args + [
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+            out_path,
+        ]
+        _run_ffmpeg(cmd)
+    else:
+        fingerprint = hashlib.sha1(
+            json.dumps([filter_chain, preset, crf, segment_seconds]).encode()
+        ).hexdigest()[:16]
+        os.makedirs(segment_dir, exist_ok=True)
+        completed_segments = completed_segments or {}
+        segment_paths = []
+        encoded = 0
+        for index, (start, length) in enumerate(segments):
+            previous = completed_segments.get(index)
+            if previous and previous[1] == fingerprint and os.path.exists(previous[0]):
+                segment_paths.append(previous[0])
+                continue
+
+            seg_path = os.path.join(segment_dir, f"seg_{index:04d}_{fingerprint}.mp4")
+            tmp_path = f"{seg_path}.part.mp4"
+            # Input-side seek is frame accurate when transcoding
+            cmd = [ffmpeg_bin, "-y", "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", input_path]
+            cmd += filter_args + video_args + ["-an", tmp_path]
+            _run_ffmpeg(cmd, timeout=segment_timeout)
+            os.replace(tmp_path, seg_path)
+            encoded += 1
+            if on_segment_done:
+                on_segment_done(index, start, length, seg_path, fingerprint)
+            segment_paths.append(seg_path)
+            if should_yield and index < len(segments) - 1 and should_yield():
+                print(f"⏸️ Yielding after segment {index + 1} of {len(segments)}")
+                raise Preempted()
+
+        print(f"🧩 {len(segments)} segments ready ({encoded} encoded this run)")
+        list_path = os.path.join(segment_dir, "concat.txt")
+        with open(list_path, "w") as f:
+            for seg_path in segment_paths:
+                f.write(f"file '{os.path.abspath(seg_path)}'\n")
+        # Join video without re-encoding and take audio from the source
+        cmd = [
+            ffmpeg_bin, "-y",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", input_path,
+            "-map", "0:v:0", "-map", "1:a:0?",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+            out_path,
+        ]
+        _run_ffmpeg(cmd, timeout=segment_timeout)
+
     if not os.path.exists(out_path):
         raise RuntimeError("Processed file was not created")
 
     return out_path
-
-
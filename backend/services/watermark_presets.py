@@ -0,0 +1,84 @@
+"""
+Watermark Presets
+Saved selection sets stored relative to the frame (fractions of width and
+height), so one preset fits every resolution of the same layout. Applying a
+preset to an upload scales it to the size recorded in the media catalog.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import Job, MediaMetadata, WatermarkPreset
+from services.video_processor import parse_watermark_selections
+
+
+def _clamp(value: float) -> float:
+    return min(1.0, max(0.0, value))
+
+
+def normalize_selections(watermarks: Iterable[Dict], width: Optional[int] = None, height: Optional[int] = None) -> List[Dict]:
+    """Rectangles as fractions of the frame.
+
+    Pixel rectangles need ``width`` and ``height``; without them the input
+    must already be relative. Raises ValueError for anything else.
+    """
+    relative = []
+    for wm in watermarks:
+        x, y, w, h = (float(wm[key]) for key in ("x", "y", "width", "height"))
+        if width and height:
+            x, w = x / width, w / width
+            y, h = y / height, h / height
+        elif max(x, y, w, h) > 1.0:
+            raise ValueError("Pixel rectangles need the frame width and height")
+        x, y = _clamp(x), _clamp(y)
+        w, h = min(_clamp(w), 1.0 - x), min(_clamp(h), 1.0 - y)
+        if w <= 0 or h <= 0:
+            continue
+        relative.append({"x": round(x, 6), "y": round(y, 6), "width": round(w, 6), "height": round(h, 6)})
+    if not relative:
+        raise ValueError("No usable watermark rectangles")
+    return relative
+
+
+def job_relative_selections(job: Job) -> List[Dict]:
+    """A job's saved pixel selections as fractions of its frame size"""
+    if job.media is None or not (job.media.width and job.media.height):
+        raise ValueError("The job's frame size is unknown")
+    return normalize_selections(
+        parse_watermark_selections(job.watermark_selections), job.media.width, job.media.height
+    )
+
+
+def preset_selections(preset: WatermarkPreset, media: Optional[MediaMetadata]) -> Optional[str]:
+    """Job selections JSON for ``preset`` scaled to ``media``'s frame; None if the size is unknown"""
+    if media is None or not (media.width and media.height):
+        return None
+    watermarks = []
+    for wm in json.loads(preset.watermarks):
+        watermarks.append({
+            "x": int(round(wm["x"] * media.width)),
+            "y": int(round(wm["y"] * media.height)),
+            "width": max(1, int(round(wm["width"] * media.width))),
+            "height": max(1, int(round(wm["height"] * media.height))),
+        })
+    return json.dumps({"watermarks": watermarks, "preset_id": preset.id})
+
+
+def upload_preset(db: Session, user_id: int, preset_id: Optional[int], shared_only: bool = False) -> Optional[WatermarkPreset]:
+    """The preset to apply to an upload.
+
+    A named preset must belong to ``user_id`` or be shared; with no name the
+    user's auto-apply preset is used. ``shared_only`` is for anonymous uploads.
+    Raises LookupError for a named preset the user can't use.
+    """
+    query = db.query(WatermarkPreset)
+    if preset_id is None:
+        if shared_only:
+            return None
+        return query.filter(WatermarkPreset.user_id == user_id, WatermarkPreset.auto_apply == True).first()
+    preset = query.filter(WatermarkPreset.id == preset_id).first()
+    if preset is None or not (preset.shared or (not shared_only and preset.user_id == user_id)):
+        raise LookupError(f"Preset {preset_id} not found")
+    return preset
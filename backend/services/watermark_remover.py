@@ -1,82 +1,186 @@
 import os
 import tempfile
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 import logging
 from PIL import Image
 import numpy as np
 
+from services.blend import FixedPointBlender
+from services.fast_marching import FastMarchingInpainter
+from services.filters import mask_bbox, median_filter
+from services.luma_pyramid import PYRAMID_MIN_SIDE, detect_coarse_to_fine, to_luma
+from services.poisson_blend import PoissonBlender
+from services.temporal_fill import TemporalFiller
+from services.tiling import TiledExecutor
+from services.window_stats import WindowScanner
+
 logger = logging.getLogger(__name__)
 
 class WatermarkDetector:
     """Simple watermark detector for common patterns"""
     
     def __init__(self):
-        pass
+        self.scanner = WindowScanner()
         
     def detect_watermark(self, frame: np.ndarray) -> np.ndarray:
-        """Detect watermark regions in a frame using simple heuristics"""
-        # Convert to grayscale for analysis
-        if len(frame.shape) == 3:
-            gray = np.mean(frame, axis=2).astype(np.uint8)
-        else:
-            gray = frame
-            
-        # Create mask for high-contrast regions (common in watermarks)
-        mask = np.zeros(gray.shape, dtype=np.uint8)
-        
-        # Look for high-contrast regions in corners (typical watermark positions)
-        h, w = gray.shape
-        corners = [
-            (0, 0, w//4, h//4),  # Top-left
-            (3*w//4, 0, w, h//4),  # Top-right
-            (0, 3*h//4, w//4, h),  # Bottom-left
-            (3*w//4, 3*h//4, w, h)  # Bottom-right
-        ]
+        """Detect watermark regions anywhere in a frame using simple heuristics"""
+        # Integer luma avoids a float64 copy of every frame
+        gray = to_luma(frame)
         
-        for x1, y1, x2, y2 in corners:
-            corner = gray[y1:y2, x1:x2]
-            if corner.size > 0:
-                # Simple threshold-based detection
-                threshold = np.mean(corner) + 2 * np.std(corner)
-                corner_mask = corner > threshold
-                if np.sum(corner_mask) > corner.size * 0.1:  # 10% threshold
-                    mask[y1:y2, x1:x2] = 255
+        # Large frames: find candidates on a 1/16 pyramid level, refine locally
+        if min(gray.shape) >= PYRAMID_MIN_SIDE:
+            return detect_coarse_to_fine(gray, self.scanner)
+            
+        # Scan high-contrast windows over the whole frame at several scales
+        return self.scanner.mask(gray)
+    
+    def detect_batch(self, frames: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Detect watermarks in an (N, H, W, C) uint8 batch into (N, H, W) masks"""
+        gray = to_luma(frames) if frames.ndim == 4 else frames
+        if out is None:
+            out = np.empty(gray.shape, dtype=np.uint8)
         
-        return mask
+        # Luma is converted for the whole batch at once. The SAT scan stays
+        # per frame: a frame-sized int64 table stays in cache, a batch-sized
+        # one does not, and the per-frame Python overhead is negligible.
+        pyramid = min(gray.shape[1:]) >= PYRAMID_MIN_SIDE
+        for i in range(gray.shape[0]):
+            if pyramid:
+                out[i] = detect_coarse_to_fine(gray[i], self.scanner)
+            else:
+                self.scanner.mask(gray[i], out=out[i])
+        return out
 
 class WatermarkInpainter:
-    """Simple inpainter using basic image processing"""
+    """Simple inpainter using basic image processing
     
-    def __init__(self):
-        pass
+    method="median" blends a 3x3 median; method="telea" uses fast-marching
+    inpainting with a fill order cached per mask; method="temporal" copies
+    background from neighbouring frames (see inpaint_stream) and falls back
+    to fast marching. With tile_size set, median frames are processed in
+    place tile by tile so temporaries stay bounded on 4K / vertical clips;
+    fast marching is never tiled (its fill order is global) and already
+    works on the mask's bounding box only. With
+    seamless=True the filled region is re-solved in the gradient domain so
+    it meets the surrounding frame without a visible seam.
+    """
+    
+    METHODS = ("median", "telea", "temporal")
     
-    def inpaint_frame(self, frame: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    def __init__(
+        self, method: str = "median", tile_size: Optional[int] = None, seamless: bool = False
+    ):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown inpainting method: {method}")
+        self.method = method
+        self.fast_marching = FastMarchingInpainter()
+        self.blender = FixedPointBlender()
+        self.poisson = PoissonBlender() if seamless else None
+        
+        self.tiler = None
+        if tile_size and method == "median":
+            # A 1-pixel halo covers the 3x3 median, so tiled output is exact
+            self.tiler = TiledExecutor(tile_size=tile_size, halo=1)
+    
+    def inpaint_frame(
+        self, frame: np.ndarray, mask: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """Inpaint watermark regions using simple interpolation"""
-        if len(frame.shape) == 3:
-            result = frame.copy()
-            for c in range(frame.shape[2]):
-                channel = frame[:, :, c]
-                # Simple inpainting using median filter
-                inpainted = self._simple_inpaint(channel, mask)
-                result[:, :, c] = inpainted
-            return result
-        else:
-            return self._simple_inpaint(frame, mask)
+        if self.tiler and frame.shape[0] * frame.shape[1] > self.tiler.tile_size ** 2:
+            # Tiled mode writes into the frame itself unless out is given
+            return self.tiler.run(frame, mask, self._inpaint_region, out=out)
+        return self._inpaint_region(frame, mask, out=out)
+    
+    @property
+    def stats(self) -> Dict:
+        """Tiling counters and peak temporary bytes per frame, empty when not tiling"""
+        return dict(self.tiler.stats) if self.tiler else {}
+    
+    def _inpaint_region(
+        self, frame: np.ndarray, mask: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        if self.poisson:
+            inpainted = self._fill_region(frame, mask)
+            return self.poisson.blend(frame, inpainted, mask, out=out if out is not None else inpainted)
+        return self._fill_region(frame, mask, out=out)
+    
+    def _fill_region(
+        self, frame: np.ndarray, mask: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        # A single frame has no neighbours to borrow from
+        if self.method in ("telea", "temporal"):
+            return self.fast_marching.inpaint(frame, mask, out=out)
+        
+        # All channels are filtered and blended together
+        return self._simple_inpaint(frame, mask, out=out)
+    
+    def inpaint_batch(
+        self, frames: np.ndarray, masks: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Inpaint an (N, H, W, C) uint8 batch into ``out``
+        
+        ``masks`` is either one (H, W) mask shared by every frame or an
+        (N, H, W) stack of per-frame masks.
+        """
+        if out is None:
+            out = frames.copy()
+        elif out is not frames:
+            np.copyto(out, frames)
+        shared = masks.ndim == 2
+        
+        if self.tiler or self.poisson or (self.method != "median" and not shared):
+            for i in range(frames.shape[0]):
+                self.inpaint_frame(out[i], masks if shared else masks[i], out=out[i])
+            return out
+        
+        if self.method != "median":
+            return self.fast_marching.inpaint_batch(out, masks, out=out)
+        
+        roi = mask_bbox(masks if shared else masks.any(axis=0))
+        if roi is None:
+            return out
+        y1, y2, x1, x2 = roi
+        
+        # One median and one blend over the ROI of every frame and channel
+        inpainted = median_filter(out, size=3, roi=roi, batched=True)
+        self.blender.blend(
+            out[:, y1:y2, x1:x2], inpainted, masks[..., y1:y2, x1:x2], out=out[:, y1:y2, x1:x2]
+        )
+        return out
+    
+    def inpaint_stream(
+        self, frames: Iterable[Tuple[np.ndarray, np.ndarray]], radius: int = 4
+    ) -> Iterator[np.ndarray]:
+        """Inpaint a (frame, mask) stream in order"""
+        if self.method == "temporal":
+            filler = TemporalFiller(radius=radius, spatial=self.fast_marching)
+            yield from filler.process(frames)
+            return
+        for frame, mask in frames:
+            yield self.inpaint_frame(frame, mask)
     
-    def _simple_inpaint(self, image: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    def _simple_inpaint(
+        self, image: np.ndarray, mask: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """Simple inpainting using median filter"""
-        from scipy import ndimage
+        if out is None:
+            out = image.copy()
+        elif out is not image:
+            np.copyto(out, image)
         
-        # Use median filter for inpainting
-        inpainted = ndimage.median_filter(image, size=3)
+        roi = mask_bbox(mask)
+        if roi is None:
+            return out
+        y1, y2, x1, x2 = roi
         
-        # Apply mask to blend result
-        mask_norm = mask.astype(np.float32) / 255.0
-        if len(image.shape) == 3:
-            mask_norm = np.stack([mask_norm] * image.shape[2], axis=2)
+        # Use median filter for inpainting, only over the mask ROI
+        inpainted = median_filter(image, size=3, roi=roi)
         
-        result = image * (1 - mask_norm) + inpainted * mask_norm
-        return result.astype(np.uint8)
+        # Blend in uint16 fixed point with weights cached per mask
+        self.blender.blend(
+            image[y1:y2, x1:x2], inpainted, mask[y1:y2, x1:x2], out=out[y1:y2, x1:x2]
+        )
+        return out
 
 class WatermarkRemover:
     """Main class for removing watermarks from videos"""
@@ -0,0 +1,207 @@
+"""
+Summed-area table window statistics
+Mean/variance of every sliding window in a frame in O(H*W) per window scale
+"""
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Window side lengths as fractions of the shorter frame side
+DEFAULT_SCALES = (0.08, 0.12, 0.18)
+
+# (x, y, w, h, score)
+Candidate = Tuple[int, int, int, int, float]
+
+
+def integral_image(image: np.ndarray, squared: bool = False) -> np.ndarray:
+    """Return the zero-padded summed-area table over the last two axes.
+
+    For an (..., H, W) input the table has shape (..., H+1, W+1) so that the
+    sum over rows y0:y1 and columns x0:x1 is
+    ``sat[y1, x1] - sat[y0, x1] - sat[y1, x0] + sat[y0, x0]``. Leading axes
+    (e.g. a batch of frames) are independent. Integer inputs are accumulated
+    in int64, everything else in float64.
+    """
+    if image.ndim < 2:
+        raise ValueError("integral_image expects an array with at least 2 dimensions")
+
+    dtype = np.int64 if np.issubdtype(image.dtype, np.integer) or image.dtype == bool else np.float64
+    h, w = image.shape[-2:]
+    sat = np.zeros(image.shape[:-2] + (h + 1, w + 1), dtype=dtype)
+    body = sat[..., 1:, 1:]
+    if squared:
+        values = image.astype(dtype)
+        np.multiply(values, values, out=values)
+        np.cumsum(values, axis=-2, out=body)
+    else:
+        np.cumsum(image, axis=-2, dtype=dtype, out=body)
+    np.cumsum(body, axis=-1, out=body)
+    return sat
+
+
+def window_sums(sat: np.ndarray, win_h: int, win_w: int, stride: int = 1) -> np.ndarray:
+    """Sum of every win_h x win_w window, indexed by its top-left corner / stride."""
+    h, w = sat.shape[-2] - 1, sat.shape[-1] - 1
+    if win_h > h or win_w > w:
+        return np.zeros(sat.shape[:-2] + (0, 0), dtype=sat.dtype)
+
+    y0 = slice(0, h - win_h + 1, stride)
+    y1 = slice(win_h, h + 1, stride)
+    x0 = slice(0, w - win_w + 1, stride)
+    x1 = slice(win_w, w + 1, stride)
+    return sat[..., y1, x1] - sat[..., y0, x1] - sat[..., y1, x0] + sat[..., y0, x0]
+
+
+def window_mean_var(
+    sat: np.ndarray,
+    sat_sq: np.ndarray,
+    win_h: int,
+    win_w: int,
+    stride: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and variance of every window from a plain and a squared SAT"""
+    area = float(win_h * win_w)
+    mean = window_sums(sat, win_h, win_w, stride) / area
+    var = window_sums(sat_sq, win_h, win_w, stride) / area
+    var -= mean * mean
+    # Cancellation can leave tiny negatives on flat windows
+    np.maximum(var, 0.0, out=var)
+    return mean, var
+
+
+class WindowScanner:
+    """Full-frame watermark search using summed-area tables.
+
+    A pixel counts as "bright" when it exceeds the frame mean by
+    ``bright_sigma`` standard deviations. A window is a candidate when
+    enough of it is bright and its local contrast is high relative to the
+    frame, which is what overlaid text/logos look like. Every statistic is
+    read from a SAT, so each window scale costs O(H*W) regardless of the
+    window size. ``mask`` also accepts an (N, H, W) batch.
+    """
+
+    def __init__(
+        self,
+        scales: Sequence[float] = DEFAULT_SCALES,
+        stride_fraction: float = 0.25,
+        bright_sigma: float = 2.0,
+        min_bright_fraction: float = 0.1,
+        max_bright_fraction: float = 0.6,
+        min_contrast: float = 1.0,
+    ):
+        self.scales = tuple(scales)
+        self.stride_fraction = stride_fraction
+        self.bright_sigma = bright_sigma
+        self.min_bright_fraction = min_bright_fraction
+        self.max_bright_fraction = max_bright_fraction
+        self.min_contrast = min_contrast
+
+    def _window_sizes(self, shape: Tuple[int, int]) -> List[Tuple[int, int]]:
+        h, w = shape
+        short_side = min(h, w)
+        sizes = []
+        for scale in self.scales:
+            side = max(2, int(round(short_side * scale)))
+            # Sora marks are wider than tall
+            size = (min(h, side), min(w, side * 2))
+            if size not in sizes:
+                sizes.append(size)
+        return sizes
+
+    def _stride(self, win_h: int) -> int:
+        return max(1, int(win_h * self.stride_fraction))
+
+    def _hits(self, gray: np.ndarray):
+        """Yield (win_h, win_w, stride, hit map, score map) for each window scale"""
+        h, w = gray.shape[-2:]
+        sat = integral_image(gray)
+        sat_sq = integral_image(gray, squared=True)
+        # (..., 1, 1) so frame statistics broadcast over each frame's windows
+        frame_mean, frame_var = window_mean_var(sat, sat_sq, h, w)
+        frame_std = np.sqrt(frame_var)
+        if not frame_std.any():
+            return
+        # Flat frames never produce hits
+        frame_std[frame_std == 0.0] = np.inf
+
+        bright = gray > frame_mean + self.bright_sigma * frame_std
+        sat_bright = integral_image(bright)
+
+        for win_h, win_w in self._window_sizes((h, w)):
+            stride = self._stride(win_h)
+            _, var = window_mean_var(sat, sat_sq, win_h, win_w, stride)
+            fraction = window_sums(sat_bright, win_h, win_w, stride) / float(win_h * win_w)
+            contrast = np.sqrt(var) / frame_std
+
+            hits = (
+                (fraction >= self.min_bright_fraction)
+                & (fraction <= self.max_bright_fraction)
+                & (contrast >= self.min_contrast)
+            )
+            yield win_h, win_w, stride, hits, fraction * contrast
+
+    def scan(self, gray: np.ndarray, max_candidates: int = 8) -> List[Candidate]:
+        """Return the strongest non-overlapping candidate windows as (x, y, w, h, score)"""
+        pool: List[Candidate] = []
+        for win_h, win_w, stride, hits, score in self._hits(gray):
+            ys, xs = np.nonzero(hits)
+            if ys.size == 0:
+                continue
+            scores = score[ys, xs]
+            # Only the top few per scale can survive suppression
+            keep = min(ys.size, max_candidates * 32)
+            top = np.argpartition(-scores, keep - 1)[:keep]
+            for i in top:
+                pool.append((int(xs[i] * stride), int(ys[i] * stride), win_w, win_h, float(scores[i])))
+
+        pool.sort(key=lambda c: c[4], reverse=True)
+        selected: List[Candidate] = []
+        for cand in pool:
+            if all(not _overlaps(cand, other) for other in selected):
+                selected.append(cand)
+                if len(selected) >= max_candidates:
+                    break
+        return selected
+
+    def mask(self, gray: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return a uint8 mask (0/255) covering every candidate window at every scale"""
+        h, w = gray.shape[-2:]
+        if out is None:
+            out = np.zeros(gray.shape, dtype=np.uint8)
+        else:
+            out[...] = 0
+
+        for win_h, win_w, stride, hits, _ in self._hits(gray):
+            if not hits.any():
+                continue
+            # Scatter hit corners back to pixel positions, then a box sum of
+            # that map tells whether any hit window covers each pixel.
+            ny, nx = hits.shape[-2:]
+            padded = np.zeros(gray.shape[:-2] + (h + win_h - 1, w + win_w - 1), dtype=np.uint8)
+            padded[..., win_h - 1:win_h - 1 + ny * stride:stride, win_w - 1:win_w - 1 + nx * stride:stride] = hits
+            covered = window_sums(integral_image(padded), win_h, win_w) > 0
+            out[covered] = 255
+
+        return out
+
+
+def _overlaps(a: Candidate, b: Candidate) -> bool:
+    ax, ay, aw, ah, _ = a
+    bx, by, bw, bh, _ = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Square dilation of a boolean/uint8 mask via a box sum, O(H*W)"""
+    inside = mask > 0
+    if radius <= 0:
+        return inside
+    size = 2 * radius + 1
+    h, w = inside.shape[-2:]
+    padded = np.zeros(inside.shape[:-2] + (h + 2 * radius, w + 2 * radius), dtype=np.uint8)
+    padded[..., radius:radius + h, radius:radius + w] = inside
+    return window_sums(integral_image(padded), size, size) > 0
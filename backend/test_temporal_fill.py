@@ -0,0 +1,45 @@
+"""
+Test that temporal fill reuses spatial fill plans for a static watermark
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+import services.fast_marching as fast_marching
+from services.temporal_fill import TemporalFiller
+
+
+def test_static_mark_solves_once():
+    """A mark that never moves leaves the same pixels, so one plan serves every frame"""
+    built = []
+    build_fill_plan = fast_marching.build_fill_plan
+
+    def counting(mask, radius=5):
+        built.append(1)
+        return build_fill_plan(mask, radius)
+
+    fast_marching.build_fill_plan = counting
+    try:
+        rng = np.random.default_rng(2)
+        mask = np.zeros((90, 160), dtype=np.uint8)
+        mask[60:75, 100:150] = 255
+        filler = TemporalFiller(radius=2)
+        frames = [(rng.integers(0, 256, size=(90, 160, 3), dtype=np.uint8), mask) for _ in range(12)]
+        filled = list(filler.process(frames))
+    finally:
+        fast_marching.build_fill_plan = build_fill_plan
+
+    assert len(filled) == 12
+    assert filler.stats["temporal_pixels"] == 0
+    assert len(built) == 1, f"{len(built)} plans built"
+    return True
+
+
+if __name__ == "__main__":
+    print("Static mark solved once:", test_static_mark_solves_once())
@@ -24,6 +24,9 @@ const DashboardPage = () => {
   const navigate = useNavigate();
   const [jobs, setJobs] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Cursor of the next page of jobs (X-Next-Cursor), null on the last page
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [uploading, setUploading] = useState(false);
   const [subscriptionStatus, setSubscriptionStatus] = useState(null);
 
@@ -42,6 +45,7 @@ const DashboardPage = () => {
     try {
       const response = await videoAPI.getUserJobs();
       setJobs(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       message.error('Failed to fetch jobs');
     } finally {
@@ -49,6 +53,20 @@ const DashboardPage = () => {
     }
   };
 
+  const loadMoreJobs = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await videoAPI.getUserJobs({ cursor: nextCursor });
+      setJobs(prev => prev.concat(response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      message.error('Failed to load more jobs');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchSubscriptionStatus = async () => {
     try {
       const response = await fetch(`${API_BASE_URL}/api/subscription/status`, {
@@ -248,20 +266,29 @@ const DashboardPage = () => {
             </Button>
           </Empty>
         ) : (
-          <Row gutter={[16, 16]}>
-            {jobs.map((job) => (
-              <Col xs={24} sm={12} lg={8} key={job.id}>
-                <JobCard
-                  job={job}
-                  onDownload={handleDownload}
-                  onDelete={handleDelete}
-                  onView={handleView}
-                  statusIcon={getStatusIcon(job.status)}
-                  statusText={getStatusText(job.status)}
-                />
-              </Col>
-            ))}
-          </Row>
+          <>
+            <Row gutter={[16, 16]}>
+              {jobs.map((job) => (
+                <Col xs={24} sm={12} lg={8} key={job.id}>
+                  <JobCard
+                    job={job}
+                    onDownload={handleDownload}
+                    onDelete={handleDelete}
+                    onView={handleView}
+                    statusIcon={getStatusIcon(job.status)}
+                    statusText={getStatusText(job.status)}
+                  />
+                </Col>
+              ))}
+            </Row>
+            {nextCursor && (
+              <div style={{ textAlign: 'center', marginTop: '24px' }}>
+                <Button onClick={loadMoreJobs} loading={loadingMore}>
+                  Load More
+                </Button>
+              </div>
+            )}
+          </>
         )}
       </Card>
     </div>
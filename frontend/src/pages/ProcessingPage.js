@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { Card, Typography, Steps, Button, message, Progress, Space, Alert } from 'antd';
 import { PlayCircleOutlined, CheckCircleOutlined, LoadingOutlined } from '@ant-design/icons';
@@ -17,11 +17,15 @@ const ProcessingPage = () => {
   const [watermarks, setWatermarks] = useState([]);
   const [isProcessing, setIsProcessing] = useState(false);
   const [processingProgress, setProcessingProgress] = useState(0);
+  // Open event stream or polling interval for the running job
+  const watcher = useRef(null);
 
   useEffect(() => {
     fetchJobDetails();
   }, [jobId]);
 
+  useEffect(() => () => stopWatching(), [jobId]);
+
   const fetchJobDetails = async () => {
     try {
       const isLoggedIn = !!localStorage.getItem('token');
@@ -73,8 +77,8 @@ const ProcessingPage = () => {
       }
       message.success('Processing started');
       
-      // Poll for status updates
-      pollJobStatus();
+      // Follow status and progress events, polling if the stream is unavailable
+      watchJobStatus();
     } catch (error) {
       message.error('Failed to start processing');
       console.error('Error starting processing:', error);
@@ -82,6 +86,81 @@ const ProcessingPage = () => {
     }
   };
 
+  const stopWatching = () => {
+    if (watcher.current) {
+      if (watcher.current.source) watcher.current.source.close();
+      if (watcher.current.interval) clearInterval(watcher.current.interval);
+      watcher.current = null;
+    }
+  };
+
+  // Returns true once the job has finished either way
+  const handleJobStatus = (jobStatus, isLoggedIn) => {
+    if (jobStatus === 'completed') {
+      stopWatching();
+      setIsProcessing(false);
+      setProcessingProgress(100);
+      message.success('Processing completed!');
+      if (isLoggedIn) {
+        navigate('/dashboard');
+      } else {
+        // Stay on page for guests; show CTA to login for download
+        setCurrentStep(2);
+      }
+      return true;
+    }
+    if (jobStatus === 'failed') {
+      stopWatching();
+      setIsProcessing(false);
+      message.error('Processing failed');
+      return true;
+    }
+    return false;
+  };
+
+  const watchJobStatus = async () => {
+    stopWatching();
+    const isLoggedIn = !!localStorage.getItem('token');
+    if (typeof window.EventSource === 'undefined') {
+      pollJobStatus();
+      return;
+    }
+
+    let url;
+    try {
+      if (isLoggedIn) {
+        const response = await videoAPI.getJobEventsToken(jobId);
+        url = videoAPI.getJobEventsUrl(jobId, response.data.token);
+      } else {
+        url = publicVideoAPI.getJobEventsUrl(jobId);
+      }
+    } catch (error) {
+      console.error('Error opening job event stream:', error);
+      pollJobStatus();
+      return;
+    }
+
+    const source = new EventSource(url);
+    watcher.current = { source };
+    source.addEventListener('status', (event) => {
+      handleJobStatus(JSON.parse(event.data).status, isLoggedIn);
+    });
+    source.addEventListener('progress', (event) => {
+      const { progress } = JSON.parse(event.data);
+      // 100 is reserved for the completed status
+      setProcessingProgress(Math.min(99, Math.round(progress * 100)));
+    });
+    source.addEventListener('end', stopWatching);
+    source.onerror = () => {
+      // The browser reconnects dropped streams itself; a refused one
+      // (expired stream token, too many streams) is closed for good
+      if (source.readyState === window.EventSource.CLOSED && watcher.current && watcher.current.source === source) {
+        stopWatching();
+        pollJobStatus();
+      }
+    };
+  };
+
   const pollJobStatus = () => {
     const interval = setInterval(async () => {
       try {
@@ -91,29 +170,15 @@ const ProcessingPage = () => {
           : await publicVideoAPI.getJobStatus(jobId);
         const jobStatus = response.data.status;
         
-        if (jobStatus === 'completed') {
-          clearInterval(interval);
-          setIsProcessing(false);
-          setProcessingProgress(100);
-          message.success('Processing completed!');
-          if (isLoggedIn) {
-            navigate('/dashboard');
-          } else {
-            // Stay on page for guests; show CTA to login for download
-            setCurrentStep(2);
-          }
-        } else if (jobStatus === 'failed') {
-          clearInterval(interval);
-          setIsProcessing(false);
-          message.error('Processing failed');
-        } else if (jobStatus === 'processing') {
-          // Simulate progress
+        if (!handleJobStatus(jobStatus, isLoggedIn) && jobStatus === 'processing') {
+          // No progress in status responses; creep towards 90
           setProcessingProgress(prev => Math.min(prev + 10, 90));
         }
       } catch (error) {
         console.error('Error polling job status:', error);
       }
     }, 2000);
+    watcher.current = { interval };
   };
 
   const getVideoUrl = () => {
@@ -37,9 +37,10 @@ export const authAPI = {
 };
 
 export const videoAPI = {
-  upload: (file) => {
+  upload: (file, presetId) => {
     const formData = new FormData();
     formData.append('file', file);
+    if (presetId) formData.append('preset_id', presetId);
     return api.post('/api/videos/upload', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
@@ -48,19 +49,28 @@ export const videoAPI = {
     });
   },
   getJobStatus: (jobId) => api.get(`/api/jobs/${jobId}/status`),
-  getUserJobs: () => api.get('/api/jobs'),
+  // The browser revalidates with the ETag, so unchanged sets come back as 304s
+  getJobsStatus: (jobIds) => api.get('/api/jobs/status', { params: { ids: jobIds.join(',') } }),
+  // Newest first; pass { cursor } from the X-Next-Cursor header for the next page
+  getUserJobs: (params) => api.get('/api/jobs', { params }),
   downloadVideo: (jobId) => api.get(`/api/jobs/${jobId}/download`),
   deleteJob: (jobId) => api.delete(`/api/jobs/${jobId}`),
   getVideoStream: (jobId) => `${API_BASE_URL}/api/videos/${jobId}/stream`,
   addWatermarkSelections: (jobId, watermarkData) => api.post(`/api/jobs/${jobId}/watermarks`, watermarkData),
   getWatermarkSelections: (jobId) => api.get(`/api/jobs/${jobId}/watermarks`),
   startProcessing: (jobId) => api.post(`/api/jobs/${jobId}/process`),
+  // EventSource can't send headers, so the stream URL carries a short-lived,
+  // single-job token from getJobEventsToken instead of the session token
+  getJobEventsToken: (jobId) => api.post(`/api/jobs/${jobId}/events/token`),
+  getJobEventsUrl: (jobId, streamToken) =>
+    `${API_BASE_URL}/api/jobs/${jobId}/events?token=${encodeURIComponent(streamToken)}`,
 };
 
 export const publicVideoAPI = {
-  upload: (file) => {
+  upload: (file, presetId) => {
     const formData = new FormData();
     formData.append('file', file);
+    if (presetId) formData.append('preset_id', presetId);
     return api.post('/api/public/upload', formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
       timeout: 60000,
@@ -70,6 +80,14 @@ export const publicVideoAPI = {
   addWatermarkSelections: (jobId, data) => api.post(`/api/public/jobs/${jobId}/watermarks`, data),
   startProcessing: (jobId) => api.post(`/api/public/jobs/${jobId}/process`),
   getPreviewStreamUrl: (jobId) => `${API_BASE_URL}/api/videos/${jobId}/stream?preview=1`,
+  getJobEventsUrl: (jobId) => `${API_BASE_URL}/api/public/jobs/${jobId}/events`,
+};
+
+export const presetAPI = {
+  list: () => api.get('/api/presets'),
+  create: (preset) => api.post('/api/presets', preset),
+  update: (presetId, changes) => api.patch(`/api/presets/${presetId}`, changes),
+  remove: (presetId) => api.delete(`/api/presets/${presetId}`),
 };
 
 export const subscriptionAPI = {